@@ -1,16 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
 import os
 import time
 import traceback
-import json
 import logging
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime
 import sys
-from threading import Thread
-from srm_scrapper import SRMScraper, run_scraper
+from threading import Thread, Lock, RLock, BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+import orjson
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from srm_scrapper import SRMScraper, run_scraper, driver_pool, set_session_cookies
 import jwt
 
+# psutil is optional; only the memory figures in /api/scraper-health use it
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_process = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -20,8 +33,102 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app, origins=["*"], supports_credentials=True)
 
-# Dictionary to track active scraper jobs
-active_jobs = {}
+# Scraper jobs expire two hours after their last update
+JOB_TTL = 2 * 3600
+active_jobs = TTLCache(maxsize=10_000, ttl=JOB_TTL)
+# Most recent job id per user; outlives the jobs themselves so a finished job stays findable
+latest_job_by_user = TTLCache(maxsize=10_000, ttl=2 * JOB_TTL)
+jobs_lock = RLock()
+
+# With REDIS_URL set, job state is kept in Redis instead so it survives restarts
+# and is visible to every worker process
+REDIS_URL = os.environ.get("REDIS_URL")
+redis_client = None
+if REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(REDIS_URL)
+
+# Bounded pool of scraper workers; each job drives its own Chrome instance,
+# so extra submissions wait in the executor queue instead of spawning browsers
+MAX_CONCURRENT_SCRAPES = int(os.environ.get("MAX_CONCURRENT_SCRAPES", 2))
+scrape_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SCRAPES, thread_name_prefix="scraper")
+# Cap on queued plus running jobs; queued jobs past this would only time out
+# waiting for a pooled browser, so new requests are refused with 503 instead
+MAX_PENDING_SCRAPES = int(os.environ.get("MAX_PENDING_SCRAPES", 5 * MAX_CONCURRENT_SCRAPES))
+scrape_slots = BoundedSemaphore(MAX_PENDING_SCRAPES)
+
+# JWT verification settings, resolved once at import. Only the signature, exp
+# and the email claim matter here, so the other registered claims are skipped.
+_JWT_SECRET = os.environ.get("JWT_SECRET", "default-secret").encode()
+_JWT_ALGORITHMS = ("HS256",)
+_JWT_OPTIONS = {"verify_aud": False, "verify_iat": False, "verify_nbf": False}
+
+# Cache of verified tokens so repeat requests skip the HS256 signature check.
+# Keyed by a BLAKE2b digest of the token so raw JWTs are never held in memory.
+TOKEN_CACHE_TTL = 60
+token_cache = TTLCache(maxsize=1024, ttl=TOKEN_CACHE_TTL)
+token_cache_lock = Lock()
+
+# Cached result of the last Chrome probe so health checks never launch a browser
+CHROME_PROBE_INTERVAL = 5 * 60
+chrome_status = {"ok": False, "browser_version": None, "driver_version": None, "checked_at": None}
+chrome_probe_lock = Lock()
+
+def save_job(job_id, state):
+    """Store the state of a scraper job, resetting its expiry"""
+    if redis_client:
+        redis_client.setex(f"job:{job_id}", JOB_TTL, orjson.dumps(state, option=orjson.OPT_NON_STR_KEYS))
+        return
+    with jobs_lock:
+        active_jobs[job_id] = state
+
+def get_job(job_id):
+    """Return the state of a scraper job, or None if unknown or expired"""
+    if redis_client:
+        raw = redis_client.get(f"job:{job_id}")
+        return orjson.loads(raw) if raw else None
+    with jobs_lock:
+        return active_jobs.get(job_id)
+
+def set_latest_job(email, job_id):
+    """Record job_id as the newest job for a user"""
+    if redis_client:
+        redis_client.setex(f"user:{email}:latest", 2 * JOB_TTL, job_id)
+        return
+    with jobs_lock:
+        latest_job_by_user[email] = job_id
+
+def get_latest_job(email):
+    """Return the id of the newest job for a user, or None"""
+    if redis_client:
+        job_id = redis_client.get(f"user:{email}:latest")
+        return job_id.decode() if job_id else None
+    with jobs_lock:
+        return latest_job_by_user.get(email)
+
+def count_jobs():
+    """Number of jobs currently tracked"""
+    if redis_client:
+        return sum(1 for _ in redis_client.scan_iter(match="job:*"))
+    with jobs_lock:
+        return len(active_jobs)
+
+def expire_jobs():
+    """Evict expired jobs now and return how many were removed"""
+    if redis_client:
+        return 0  # Redis expires keys on its own
+    with jobs_lock:
+        before = len(active_jobs)
+        active_jobs.expire()
+        return before - len(active_jobs)
+
+def json_response(payload):
+    """Serialize a response body with orjson instead of Flask's stdlib encoder"""
+    return Response(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), mimetype="application/json")
+
+def get_request_json():
+    """Parse the request body with orjson"""
+    return orjson.loads(request.get_data() or b"{}")
 
 # Helper function to extract email from JWT token
 def get_email_from_token(request):
@@ -31,88 +138,87 @@ def get_email_from_token(request):
         return None, "No token provided"
         
     token = auth_header.split(" ")[1]
+    token_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    # Serve from cache while both the cache entry and the token are still valid
+    with token_cache_lock:
+        cached = token_cache.get(token_key)
+    if cached and cached[1] > time.time():
+        return cached[0], None
     
     try:
         # Extract email from token
-        decoded = jwt.decode(token, os.environ.get("JWT_SECRET", "default-secret"), algorithms=["HS256"])
+        decoded = jwt.decode(token, _JWT_SECRET, algorithms=_JWT_ALGORITHMS, options=_JWT_OPTIONS)
         email = decoded.get("email")
         if not email:
             return None, "Invalid token: missing email"
+        
+        # Only verified tokens are cached, and never beyond their own expiry
+        exp = decoded.get("exp")
+        expires_at = min(time.time() + TOKEN_CACHE_TTL, exp) if exp else time.time() + TOKEN_CACHE_TTL
+        with token_cache_lock:
+            token_cache[token_key] = (email, expires_at)
         return email, None
     except Exception as e:
         logger.error(f"Token verification error: {str(e)}")
         return None, f"Invalid token: {str(e)}"
 
-def run_scraper_in_background(email, password, scraper_type="all", cookies=None):
+def run_scraper_in_background(job_id, email, password, scraper_type="all", cookies=None):
     """Run the scraper in a background thread and update status when done"""
-    job_id = f"{email}_{scraper_type}_{int(time.time())}"
-    
     try:
         logger.info(f"Starting {scraper_type} scraper for {email}")
-        active_jobs[job_id] = {"status": "running", "started_at": datetime.utcnow().isoformat()}
+        save_job(job_id, {"status": "running", "started_at": datetime.utcnow().isoformat()})
         
-        # Run the appropriate scraper
-        scraper = SRMScraper(email, password)
-        driver_created = False
-        
-        try:
-            # If cookies are provided, try to use them
-            if cookies:
-                scraper.setup_driver()
-                driver_created = True
-                scraper.driver.get("https://academia.srmist.edu.in")
-                for cookie_name, cookie_value in cookies.items():
-                    scraper.driver.add_cookie({"name": cookie_name, "value": cookie_value})
-                scraper.is_logged_in = True
+        # Run the appropriate scraper on a pooled browser
+        with driver_pool.acquire() as driver:
+            scraper = SRMScraper(email, password, driver=driver)
             
-            if scraper_type == "all":
-                result = scraper.run_unified_scraper()
-            elif scraper_type == "attendance":
-                result = scraper.run_attendance_scraper()
-            elif scraper_type == "timetable":
-                result = scraper.run_timetable_scraper()
-            else:
-                raise ValueError(f"Unknown scraper type: {scraper_type}")
+            try:
+                # If cookies are provided, try to use them
+                if cookies:
+                    set_session_cookies(scraper.driver, cookies)
+                    scraper.is_logged_in = True
                 
-            # Update job status on completion
-            active_jobs[job_id] = {
-                "status": "completed",
-                "finished_at": datetime.utcnow().isoformat(),
-                "result": result
-            }
-            
-            logger.info(f"Scraper job {job_id} completed successfully")
-            
-        except Exception as e:
-            # Ensure we handle errors and clean up resources
-            logger.error(f"Error in scraper execution: {str(e)}")
-            active_jobs[job_id] = {
-                "status": "error",
-                "error": str(e),
-                "finished_at": datetime.utcnow().isoformat()
-            }
-        finally:
-            # Always ensure browser is closed
-            if driver_created and scraper.driver:
-                try:
-                    scraper.driver.quit()
-                    logger.info("Browser resources cleaned up")
-                except Exception as ce:
-                    logger.error(f"Error closing browser: {str(ce)}")
+                if scraper_type == "all":
+                    result = scraper.run_unified_scraper()
+                elif scraper_type == "attendance":
+                    result = scraper.run_attendance_scraper()
+                elif scraper_type == "timetable":
+                    result = scraper.run_timetable_scraper()
+                else:
+                    raise ValueError(f"Unknown scraper type: {scraper_type}")
+                    
+                # Update job status on completion
+                save_job(job_id, {
+                    "status": "completed",
+                    "finished_at": datetime.utcnow().isoformat(),
+                    "result": result
+                })
+                
+                logger.info(f"Scraper job {job_id} completed successfully")
+                
+            except Exception as e:
+                # Ensure we handle errors; the pool resets the browser on release
+                logger.error(f"Error in scraper execution: {str(e)}")
+                save_job(job_id, {
+                    "status": "error",
+                    "error": str(e),
+                    "finished_at": datetime.utcnow().isoformat()
+                })
         
     except Exception as e:
         logger.error(f"Error in scraper job {job_id}: {str(e)}")
         traceback.print_exc()
-        active_jobs[job_id] = {
+        save_job(job_id, {
             "status": "error",
             "error": str(e),
             "finished_at": datetime.utcnow().isoformat()
-        }
+        })
 
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for load balancers"""
-    return jsonify({
+    return json_response({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0"
@@ -122,34 +228,29 @@ def health_check():
 def login():
     """Login endpoint that returns cookies for future use"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         email = data.get("email")
         password = data.get("password")
         
         if not email or not password:
-            return jsonify({"success": False, "error": "Email and password are required"}), 400
+            return json_response({"success": False, "error": "Email and password are required"}), 400
             
         logger.info(f"Login attempt for {email}")
         
-        # Create scraper instance and perform login
-        scraper = SRMScraper(email, password)
-        login_success = scraper.login()
-        
-        if not login_success:
-            return jsonify({"success": False, "error": "Invalid credentials or login failed"}), 401
-            
-        # Get cookies from the browser
-        cookies = {}
-        for cookie in scraper.driver.get_cookies():
-            cookies[cookie['name']] = cookie['value']
+        # Create scraper instance on a pooled browser and perform login
+        with driver_pool.acquire() as driver:
+            scraper = SRMScraper(email, password, driver=driver)
+            login_success = scraper.login()
             
-        # Clean up browser resources
-        try:
-            scraper.driver.quit()
-        except:
-            pass
+            if not login_success:
+                return json_response({"success": False, "error": "Invalid credentials or login failed"}), 401
+                
+            # Get cookies from the browser
+            cookies = {}
+            for cookie in scraper.driver.get_cookies():
+                cookies[cookie['name']] = cookie['value']
             
-        return jsonify({
+        return json_response({
             "success": True,
             "message": "Login successful",
             "cookies": cookies
@@ -158,138 +259,93 @@ def login():
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+        return json_response({"success": False, "error": str(e)}), 500
 
-@app.route("/api/scrape", methods=["POST"])
-def scrape_data():
-    """Endpoint to scrape attendance and marks data"""
+def _launch_scrape(scraper_type, message, email=None):
+    """
+    Validate a scrape request, register its job and queue it on the worker pool.
+    When email is given (token-authenticated refresh) stored cookies are required instead of a password.
+    """
     try:
-        data = request.get_json()
-        email = data.get("email")
-        password = data.get("password")
+        data = get_request_json()
         cookies = data.get("cookies")
         
-        if not email:
-            return jsonify({"success": False, "error": "Email is required"}), 400
-            
-        if not cookies and not password:
-            return jsonify({"success": False, "error": "Either cookies or password is required"}), 400
+        if email is None:
+            email = data.get("email")
+            password = data.get("password")
             
-        # Start scraper in background thread
-        thread = Thread(
-            target=run_scraper_in_background,
-            args=(email, password, "attendance"),
-            kwargs={"cookies": cookies},  # Pass cookies to the scraper
-            daemon=True
-        )
-        thread.start()
+            if not email:
+                return json_response({"success": False, "error": "Email is required"}), 400
+                
+            if not cookies and not password:
+                return json_response({"success": False, "error": "Either cookies or password is required"}), 400
+        else:
+            password = None
+            if not cookies:
+                return json_response({"success": False, "error": "Cookies are required for refresh"}), 400
+        
+        if not scrape_slots.acquire(blocking=False):
+            logger.warning(f"⚠️ Scrape queue full ({MAX_PENDING_SCRAPES} jobs), rejecting {scraper_type} request")
+            return json_response({"success": False, "error": "Scraper queue is full, try again later"}), 503
         
-        job_id = f"{email}_attendance_{int(time.time())}"
+        try:
+            # Register the job before queueing so an immediate status poll finds it
+            job_id = f"{email}_{scraper_type}_{int(time.time() * 1000)}"
+            save_job(job_id, {"status": "queued", "queued_at": datetime.utcnow().isoformat()})
+            set_latest_job(email, job_id)
+            
+            future = scrape_executor.submit(run_scraper_in_background, job_id, email, password, scraper_type, cookies=cookies)
+        except Exception:
+            scrape_slots.release()
+            raise
+        future.add_done_callback(lambda _: scrape_slots.release())
         
-        return jsonify({
+        return json_response({
             "success": True,
-            "message": "Scraper started successfully",
+            "message": message,
             "job_id": job_id
         }), 202
         
     except Exception as e:
-        logger.error(f"Scrape error: {str(e)}")
+        logger.error(f"{scraper_type.capitalize()} scrape error: {str(e)}")
         traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+        return json_response({"success": False, "error": str(e)}), 500
+
+@app.route("/api/scrape", methods=["POST"])
+def scrape_data():
+    """Endpoint to scrape attendance and marks data"""
+    return _launch_scrape("attendance", "Scraper started successfully")
 
 @app.route("/api/scrape-timetable", methods=["POST"])
 def scrape_timetable():
     """Endpoint to scrape timetable data"""
-    try:
-        data = request.get_json()
-        email = data.get("email")
-        password = data.get("password")
-        cookies = data.get("cookies")
-        
-        if not email:
-            return jsonify({"success": False, "error": "Email is required"}), 400
-            
-        if not cookies and not password:
-            return jsonify({"success": False, "error": "Either cookies or password is required"}), 400
-            
-        # Start scraper in background thread
-        thread = Thread(
-            target=run_scraper_in_background,
-            args=(email, password, "timetable"),
-            kwargs={"cookies": cookies},  # Pass cookies to the scraper
-            daemon=True
-        )
-        thread.start()
-        
-        job_id = f"{email}_timetable_{int(time.time())}"
-        
-        return jsonify({
-            "success": True,
-            "message": "Timetable scraper started successfully",
-            "job_id": job_id
-        }), 202
-        
-    except Exception as e:
-        logger.error(f"Timetable scrape error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+    return _launch_scrape("timetable", "Timetable scraper started successfully")
 
 @app.route("/api/scrape-all", methods=["POST"])
 def scrape_all():
     """Endpoint to scrape all data at once (timetable, attendance, marks)"""
-    try:
-        data = request.get_json()
-        email = data.get("email")
-        password = data.get("password")
-        cookies = data.get("cookies")
-        
-        if not email:
-            return jsonify({"success": False, "error": "Email is required"}), 400
-            
-        if not cookies and not password:
-            return jsonify({"success": False, "error": "Either cookies or password is required"}), 400
-            
-        # Start scraper in background thread
-        thread = Thread(
-            target=run_scraper_in_background,
-            args=(email, password, "all"),
-            kwargs={"cookies": cookies},  # Pass cookies to the scraper
-            daemon=True
-        )
-        thread.start()
-        
-        job_id = f"{email}_all_{int(time.time())}"
-        
-        return jsonify({
-            "success": True,
-            "message": "Unified scraper started successfully",
-            "job_id": job_id
-        }), 202
-        
-    except Exception as e:
-        logger.error(f"Unified scrape error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+    return _launch_scrape("all", "Unified scraper started successfully")
 
 @app.route("/api/status/<job_id>", methods=["GET"])
 def job_status(job_id):
     """Get status of a running or completed scraper job"""
     try:
-        if job_id in active_jobs:
-            return jsonify({
+        job = get_job(job_id)
+        if job is not None:
+            return json_response({
                 "success": True,
                 "job_id": job_id,
-                "status": active_jobs[job_id]
+                "status": job
             }), 200
         else:
-            return jsonify({
+            return json_response({
                 "success": False,
                 "error": "Job not found"
             }), 404
             
     except Exception as e:
         logger.error(f"Status check error: {str(e)}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        return json_response({"success": False, "error": str(e)}), 500
 
 @app.route("/api/scraper-health", methods=["GET"])
 def scraper_health():
@@ -298,86 +354,84 @@ def scraper_health():
         # Verify token for authorized access
         email, error = get_email_from_token(request)
         if error:
-            return jsonify({"success": False, "error": error}), 401
+            return json_response({"success": False, "error": error}), 401
         
-        # Run a quick test to ensure Chrome can be initialized
-        scraper = SRMScraper("test@example.com", "password")
-        can_initialize = False
+        # Report the cached probe; refresh it off the request thread when stale or never completed
+        if chrome_status["checked_at"] is None or time.time() - chrome_status["checked_at"] > CHROME_PROBE_INTERVAL:
+            Thread(target=probe_chrome, daemon=True).start()
         
-        try:
-            scraper.setup_driver()
-            can_initialize = True
-            # Clean up immediately
-            scraper.driver.quit()
-        except Exception as e:
-            logger.error(f"Chrome initialization error in health check: {str(e)}")
+        if chrome_status["checked_at"] is None:
+            status = "unknown"
+        else:
+            status = "healthy" if chrome_status["ok"] else "unhealthy"
             
         # Return health status
-        return jsonify({
+        return json_response({
             "success": True,
-            "status": "healthy" if can_initialize else "unhealthy",
+            "status": status,
             "timestamp": datetime.utcnow().isoformat(),
+            "chrome_version": chrome_status["browser_version"],
+            "chromedriver_version": chrome_status["driver_version"],
             "memory_usage": get_memory_usage(),
-            "active_jobs": len(active_jobs)
+            "active_jobs": count_jobs()
         })
     except Exception as e:
         logger.error(f"Health check error: {str(e)}")
-        return jsonify({"success": False, "error": str(e)}), 500
-        
+        return json_response({"success": False, "error": str(e)}), 500
+        
+def probe_chrome():
+    """
+    Check that a Chrome driver can be obtained and record the result.
+    Never waits on the scrape pool: when every driver is busy the last known status is kept.
+    """
+    if not chrome_probe_lock.acquire(blocking=False):
+        return  # Another probe is already running
+    try:
+        with driver_pool.acquire(blocking=False) as driver:
+            if driver is None:
+                logger.info("Chrome probe skipped: every pooled driver is busy")
+                return
+            capabilities = driver.capabilities
+            chrome_status["browser_version"] = capabilities.get("browserVersion")
+            chrome_status["driver_version"] = capabilities.get("chrome", {}).get("chromedriverVersion", "").split(" ")[0] or None
+        chrome_status["ok"] = True
+        chrome_status["checked_at"] = time.time()
+    except Exception as e:
+        logger.error(f"Chrome initialization error in health probe: {str(e)}")
+        chrome_status["ok"] = False
+        chrome_status["checked_at"] = time.time()
+    finally:
+        chrome_probe_lock.release()
+
 def get_memory_usage():
     """Get memory usage of the current process"""
+    global _process
+    if psutil is None:
+        return {"error": "psutil not installed"}
     try:
-        import psutil
-        process = psutil.Process(os.getpid())
-        memory_info = process.memory_info()
+        # Built once per process; gunicorn preloads this module, so rebuild after a fork
+        if _process is None or _process.pid != os.getpid():
+            _process = psutil.Process()
+        memory_info = _process.memory_info()
         return {
             "rss_mb": memory_info.rss / (1024 * 1024),
             "vms_mb": memory_info.vms / (1024 * 1024)
         }
-    except ImportError:
-        return {"error": "psutil not installed"}
     except Exception as e:
         return {"error": str(e)}
 
 @app.route("/api/refresh-data", methods=["POST"])
 def refresh_data():
     """Endpoint to refresh user data (called when user clicks refresh button)"""
-    try:
-        # Get email from token
-        email, error = get_email_from_token(request)
-        if error:
-            return jsonify({"success": False, "error": error}), 401
-        
-        # Get cookies from request body
-        data = request.get_json()
-        cookies = data.get("cookies")
-        
-        if not cookies:
-            return jsonify({"success": False, "error": "Cookies are required for refresh"}), 400
-            
-        logger.info(f"Starting refresh for {email}")
-        
-        # Start scraper in background thread - attendance is sufficient for refresh
-        thread = Thread(
-            target=run_scraper_in_background,
-            args=(email, None, "attendance"),  # Pass None as password since we're using cookies
-            kwargs={"cookies": cookies},
-            daemon=True
-        )
-        thread.start()
+    # Get email from token
+    email, error = get_email_from_token(request)
+    if error:
+        return json_response({"success": False, "error": error}), 401
         
-        job_id = f"{email}_refresh_{int(time.time())}"
-        
-        return jsonify({
-            "success": True,
-            "message": "Refresh started successfully",
-            "job_id": job_id
-        }), 202
-        
-    except Exception as e:
-        logger.error(f"Refresh error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+    logger.info(f"Starting refresh for {email}")
+    
+    # Attendance is sufficient for refresh
+    return _launch_scrape("attendance", "Refresh started successfully", email=email)
 
 @app.route("/api/verify-cookies", methods=["POST"])
 def verify_cookies():
@@ -386,49 +440,47 @@ def verify_cookies():
         # Get email from token
         email, error = get_email_from_token(request)
         if error:
-            return jsonify({"success": False, "error": error}), 401
+            return json_response({"success": False, "error": error}), 401
         
         # Get cookies from request body
-        data = request.get_json()
+        data = get_request_json()
         cookies = data.get("cookies")
         
         if not cookies:
-            return jsonify({"success": False, "error": "Cookies are required"}), 400
+            return json_response({"success": False, "error": "Cookies are required"}), 400
             
         logger.info(f"Verifying cookies for {email}")
         
-        # Create a temporary scraper to verify cookies
-        scraper = SRMScraper(email, None)  # No password needed
-        
         try:
-            # Set up driver and add cookies
-            scraper.setup_driver()
-            scraper.driver.get("https://academia.srmist.edu.in")
-            for cookie_name, cookie_value in cookies.items():
-                scraper.driver.add_cookie({"name": cookie_name, "value": cookie_value})
+            # Borrow a pooled browser and add cookies
+            with driver_pool.acquire() as driver:
+                set_session_cookies(driver, cookies)
+                    
+                # Try to access a page that requires login
+                driver.get("https://academia.srmist.edu.in/#Page:My_Attendance")
                 
-            # Try to access a page that requires login
-            scraper.driver.get("https://academia.srmist.edu.in/#Page:My_Attendance")
-            
-            # Wait a bit for the page to load
-            time.sleep(2)
-            
-            # Check if we're still on the login page
-            current_url = scraper.driver.current_url
-            
-            # Clean up resources
-            scraper.driver.quit()
+                # Wait until we are either bounced to login or the dashboard renders
+                try:
+                    WebDriverWait(driver, 5).until(
+                        lambda d: "login" in d.current_url.lower()
+                        or d.execute_script("return !!document.querySelector(\"a[href*='My_Attendance']\")")
+                    )
+                except TimeoutException:
+                    pass
+                
+                # Check if we're still on the login page
+                current_url = driver.current_url
             
             # If redirected to login, cookies are invalid
             if "login" in current_url.lower():
-                return jsonify({
+                return json_response({
                     "success": True, 
                     "valid": False,
                     "message": "Cookies expired or invalid"
                 })
                 
             # Cookies are valid
-            return jsonify({
+            return json_response({
                 "success": True,
                 "valid": True,
                 "message": "Cookies are valid"
@@ -436,14 +488,8 @@ def verify_cookies():
             
         except Exception as e:
             # If there's any error, assume cookies are invalid
-            if scraper.driver:
-                try:
-                    scraper.driver.quit()
-                except:
-                    pass
-                    
             logger.error(f"Error verifying cookies: {str(e)}")
-            return jsonify({
+            return json_response({
                 "success": True,
                 "valid": False,
                 "message": f"Error verifying cookies: {str(e)}"
@@ -452,85 +498,24 @@ def verify_cookies():
     except Exception as e:
         logger.error(f"Cookie verification error: {str(e)}")
         traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+        return json_response({"success": False, "error": str(e)}), 500
 
 @app.route("/api/cleanup", methods=["POST"])
 def cleanup_resources():
     """Manually trigger cleanup of completed or old jobs"""
     try:
-        # Remove jobs older than 2 hours
-        cutoff_time = (datetime.utcnow() - timedelta(hours=2)).isoformat()
-        jobs_to_remove = []
+        # Jobs untouched for JOB_TTL are evicted anyway; this just does it eagerly
+        removed = expire_jobs()
         
-        for job_id, job_info in active_jobs.items():
-            # Remove completed or errored jobs
-            if job_info.get("status") in ["completed", "error"]:
-                if job_info.get("finished_at", "") < cutoff_time:
-                    jobs_to_remove.append(job_id)
-                    
-            # Also remove very old running jobs (probably stalled)
-            elif job_info.get("status") == "running" and job_info.get("started_at", "") < cutoff_time:
-                jobs_to_remove.append(job_id)
-        
-        # Remove the jobs
-        for job_id in jobs_to_remove:
-            active_jobs.pop(job_id, None)
-            
-        # Force garbage collection
-        import gc
-        gc.collect()
-        
-        return jsonify({
+        return json_response({
             "success": True,
-            "message": f"Cleaned up {len(jobs_to_remove)} old jobs",
-            "remaining_jobs": len(active_jobs)
+            "message": f"Cleaned up {removed} old jobs",
+            "remaining_jobs": count_jobs()
         })
         
     except Exception as e:
         logger.error(f"Cleanup error: {str(e)}")
-        return jsonify({"success": False, "error": str(e)}), 500
-
-# Setup automatic cleanup
-def start_cleanup_scheduler():
-    """Start a background thread that periodically cleans up old jobs"""
-    def cleanup_job():
-        while True:
-            try:
-                logger.info("Running scheduled cleanup")
-                # Remove jobs older than 2 hours
-                cutoff_time = (datetime.utcnow() - timedelta(hours=2)).isoformat()
-                jobs_to_remove = []
-                
-                for job_id, job_info in active_jobs.items():
-                    # Remove completed or errored jobs
-                    if job_info.get("status") in ["completed", "error"]:
-                        if job_info.get("finished_at", "") < cutoff_time:
-                            jobs_to_remove.append(job_id)
-                            
-                    # Also remove very old running jobs (probably stalled)
-                    elif job_info.get("status") == "running" and job_info.get("started_at", "") < cutoff_time:
-                        jobs_to_remove.append(job_id)
-                
-                # Remove the jobs
-                for job_id in jobs_to_remove:
-                    active_jobs.pop(job_id, None)
-                    
-                if jobs_to_remove:
-                    logger.info(f"Auto-cleaned {len(jobs_to_remove)} old jobs")
-                    
-                # Force garbage collection
-                import gc
-                gc.collect()
-            except Exception as e:
-                logger.error(f"Error in scheduled cleanup: {str(e)}")
-                
-            # Sleep for 30 minutes before next cleanup
-            time.sleep(30 * 60)
-
-    # Start the cleanup thread
-    cleanup_thread = Thread(target=cleanup_job, daemon=True)
-    cleanup_thread.start()
-    logger.info("Scheduled cleanup thread started")
+        return json_response({"success": False, "error": str(e)}), 500
 
 @app.route("/api/refresh-status", methods=["GET"])
 def refresh_status():
@@ -539,27 +524,24 @@ def refresh_status():
         # Get email from token
         email, error = get_email_from_token(request)
         if error:
-            return jsonify({"success": False, "error": error}), 401
+            return json_response({"success": False, "error": error}), 401
             
         # Find the most recent job for this user
-        user_jobs = [job_id for job_id in active_jobs if job_id.startswith(email)]
-        if not user_jobs:
-            return jsonify({
+        recent_job_id = get_latest_job(email)
+        job_status = get_job(recent_job_id) if recent_job_id else None
+        if not job_status:
+            return json_response({
                 "success": True,
                 "status": "not_started",
                 "message": "No refresh jobs found for this user"
             })
-            
-        # Get the most recent job (sort by timestamp in job_id)
-        recent_job_id = sorted(user_jobs, key=lambda x: int(x.split('_')[-1]) if x.split('_')[-1].isdigit() else 0, reverse=True)[0]
-        job_status = active_jobs.get(recent_job_id, {"status": "unknown"})
         
         # Get updated_at timestamp if job is completed
         updated_at = None
         if job_status.get("status") == "completed":
             updated_at = job_status.get("finished_at")
         
-        return jsonify({
+        return json_response({
             "success": True,
             "status": job_status.get("status", "unknown"),
             "updated_at": updated_at,
@@ -570,12 +552,10 @@ def refresh_status():
     except Exception as e:
         logger.error(f"Refresh status error: {str(e)}")
         traceback.print_exc()
-        return jsonify({"success": False, "error": str(e)}), 500
+        return json_response({"success": False, "error": str(e)}), 500
 
 if __name__ == "__main__":
-    # Start the automatic cleanup scheduler
-    start_cleanup_scheduler()
-    
     port = int(os.environ.get("PORT", 8080))
     logger.info(f"Starting scraper service on port {port}")
-    app.run(host="0.0.0.0", port=port) 
\ No newline at end of file
+    # Hand off to gunicorn instead of Flask's single-threaded dev server
+    os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn.conf.py", "app:app"])
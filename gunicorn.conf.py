@@ -0,0 +1,17 @@
+# Gunicorn settings for the scraper service
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# Every worker builds its own Chrome pool (DRIVER_POOL_SIZE browsers) and scrape
+# executor, so memory grows with the worker count even when REDIS_URL shares job state.
+# Default to a single worker and get request concurrency from threads instead;
+# raise WEB_CONCURRENCY only with the per-worker Chrome cost in mind.
+# Selenium's HTTP client is not safe under gevent monkey-patching.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = 120
+
+# Import the app once in the master so module-level state is shared copy-on-write
+preload_app = True
@@ -1,23 +1,47 @@
 import time
-import json
 import os
 import re
 import logging
-import traceback
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 import sys
+import queue
+import threading
+import hashlib
+import hmac
+import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, NoSuchElementException
 from bs4 import BeautifulSoup
+try:
+    from lxml import html as lxml_html
+    HTML_PARSER = "lxml"
+except ImportError:
+    lxml_html = None
+    HTML_PARSER = "html.parser"
 from supabase import create_client, Client
+import httpx
+import orjson
+# HTTP/2 for the Supabase connection is optional; httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 from werkzeug.security import generate_password_hash
 from dotenv import load_dotenv
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime, timedelta
 import jwt
+from cachetools import TTLCache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -27,6 +51,37 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Scraper threads only enqueue log records; a listener thread does the formatting and stream writes
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    QueueHandler that skips the default prepare(), which formats the message and traceback on the
+    logging thread. The queue never leaves the process, so records (and exc_info) go through as-is
+    and the listener's handlers format them; %-style args must not be mutated after the log call.
+    """
+    def prepare(self, record):
+        return record
+
+_root_logger = logging.getLogger()
+_LOG_TARGETS = tuple(_root_logger.handlers)
+_LOG_QUEUE_HANDLER = _DeferredFormatQueueHandler(queue.SimpleQueue())
+for _handler in _LOG_TARGETS:
+    _root_logger.removeHandler(_handler)
+_root_logger.addHandler(_LOG_QUEUE_HANDLER)
+_LOG_LISTENER = None
+
+def _start_log_listener():
+    """Start the log listener on a fresh queue; also run in forked gunicorn workers, where the thread doesn't survive"""
+    global _LOG_LISTENER
+    log_queue = queue.SimpleQueue()
+    _LOG_QUEUE_HANDLER.queue = log_queue
+    _LOG_LISTENER = QueueListener(log_queue, *_LOG_TARGETS, respect_handler_level=True)
+    _LOG_LISTENER.start()
+
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+# Flush queued records on shutdown
+atexit.register(lambda: _LOG_LISTENER.stop())
+
 # Environment variable logging for Render debugging
 def log_environment():
     """Log environment variables to help debug Render deployment"""
@@ -41,141 +96,670 @@ def log_environment():
 # Call environment logging AFTER logger is defined
 log_environment()
 
+# Debug artifacts (cookie dumps, screenshots) are only written when SCRAPER_DEBUG=1
+_DEBUG = os.getenv("SCRAPER_DEBUG") == "1"
+
+# psutil is optional; only memory logging uses it
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_MB = 1024 * 1024
+_PROCESS = None
+
+def _current_process():
+    """psutil handle for this process, rebuilt after a fork (gunicorn preloads this module in the master)"""
+    global _PROCESS
+    if psutil is None:
+        return None
+    if _PROCESS is None or _PROCESS.pid != os.getpid():
+        _PROCESS = psutil.Process()
+    return _PROCESS
+
 # ====== Supabase Configuration ======
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# JWT signing key, read and encoded once (set JWT_SECRET_KEY in .env)
+_JWT_SECRET = os.getenv('JWT_SECRET_KEY', 'your-secret-key').encode()
+_JWT_ALG = "HS256"
+_JWT_ALGORITHMS = (_JWT_ALG,)
+# Lifetime of tokens issued after login
+_JWT_TTL = timedelta(days=30)
+
+def _b64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# The HS256 header never changes, so its encoded segment is built once
+_JWT_HEADER_SEGMENT = _b64url(orjson.dumps({"alg": _JWT_ALG, "typ": "JWT"}))
+
+def _sign_jwt(payload):
+    """Encode and HS256-sign a JWT with one orjson dump and one OpenSSL-backed HMAC"""
+    signing_input = _JWT_HEADER_SEGMENT + b"." + _b64url(orjson.dumps(payload))
+    signature = hmac.new(_JWT_SECRET, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + _b64url(signature)).decode()
+
+# One decoder and one options dict shared by every verification
+_JWT = jwt.PyJWT()
+_JWT_OPTIONS = {'require': ['exp', 'email'], 'verify_exp': True}
+
+_SECONDS_PER_DAY = 86400.0
+
+# Verified (email, exp) pairs, keyed by a digest of the token; short-lived so revocation stays prompt
+JWT_CACHE_TTL = 60
+_JWT_CACHE = TTLCache(maxsize=10_000, ttl=JWT_CACHE_TTL)
+_JWT_CACHE_LOCK = threading.Lock()
+
+def _decode_cached(token):
+    """
+    Verify a scraper-issued JWT and return its (email, exp) claims, reusing them for up to JWT_CACHE_TTL seconds.
+    Raises jwt.InvalidTokenError like jwt.decode; expiry is re-checked on every cache hit.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _JWT_CACHE_LOCK:
+        claims = _JWT_CACHE.get(key)
+    if claims is None:
+        decoded = _JWT.decode(token, _JWT_SECRET, algorithms=_JWT_ALGORITHMS, options=_JWT_OPTIONS)
+        claims = (decoded['email'], decoded['exp'])
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE[key] = claims
+    elif claims[1] <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return claims
+
+# Recent (token, updated_at) per email for token-status polls; the entry is dropped whenever login stores new cookies
+USER_COOKIE_CACHE_TTL = 15
+_USER_COOKIE_CACHE = TTLCache(maxsize=4096, ttl=USER_COOKIE_CACHE_TTL)
+_USER_COOKIE_CACHE_LOCK = threading.Lock()
+
+def reload_jwt_secret():
+    """Re-read JWT_SECRET_KEY after a rotation and drop payloads verified with the old key"""
+    global _JWT_SECRET
+    with _JWT_CACHE_LOCK:
+        _JWT_SECRET = os.getenv('JWT_SECRET_KEY', 'your-secret-key').encode()
+        _JWT_CACHE.clear()
+    logger.info("🔑 Reloaded JWT secret and cleared token cache")
+
+# Placeholder hash for users created by the scraper; PBKDF2 is slow, so hash once per process
+_DUMMY_PWD_HASH = generate_password_hash("dummy_password")
+
+def _orjson_session_class(base):
+    """Subclass PostgREST's httpx session so request bodies are encoded with orjson instead of json.dumps"""
+    class OrjsonSession(base):
+        def build_request(self, method, url, *, json=None, **kwargs):
+            if json is not None:
+                headers = httpx.Headers(kwargs.get("headers"))
+                headers["Content-Type"] = "application/json"
+                kwargs["headers"] = headers
+                kwargs["content"] = orjson.dumps(json)
+            return super().build_request(method, url, **kwargs)
+    return OrjsonSession
+
+def _tune_postgrest_session(client):
+    """
+    Swap PostgREST's HTTP session for one that keeps TLS connections warm between scrapes
+    (multiplexed over HTTP/2 when h2 is installed) and serialises upsert payloads with orjson.
+    supabase-py reuses client.postgrest.session for every table() call, so this covers all queries.
+    The transport retries failed connection attempts only, so upserts are never sent twice.
+    """
+    old = client.postgrest.session
+    transport = httpx.HTTPTransport(
+        http2=_HTTP2,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=300),
+        retries=3,
+    )
+    client.postgrest.session = _orjson_session_class(type(old))(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=old.timeout,
+        follow_redirects=old.follow_redirects,
+        transport=transport,
+    )
+    old.close()
+
+_tune_postgrest_session(supabase)
+
 # ====== URLs and Constants ======
 BASE_URL = "https://academia.srmist.edu.in"
 LOGIN_URL = BASE_URL
 ATTENDANCE_PAGE_URL = BASE_URL + "/#Page:My_Attendance"
 TIMETABLE_URL = BASE_URL + "/#Page:My_Time_Table_2023_24"
+# Endpoint the portal's JS loads the attendance page from; fetched directly once logged in
+ATTENDANCE_HTTP_URL = BASE_URL + "/srm_university/academia-academic-services/page/My_Attendance"
+
+# Set SCRAPER_HTTP_FETCH=0 to always load post-login pages in the browser
+HTTP_PAGE_FETCH = os.getenv("SCRAPER_HTTP_FETCH", "1") == "1"
+
+# Zoho Creator returns page HTML \xNN-escaped inside a pageSanitizer.sanitize('...') call
+_PAGE_SANITIZE_RE = re.compile(r"pageSanitizer\.sanitize\('(.*?)'\);", re.S)
+# Consecutive escapes are one UTF-8 byte sequence, so they are decoded as a run
+_HEX_ESCAPE_RUN_RE = re.compile(r'(?:\\x[0-9a-fA-F]{2})+')
+
+# Cookies whose presence means the Academia (Zoho) session is still alive
+SESSION_COOKIE_NAMES = ("JSESSIONID", "_iamadt", "_iambdt")
+
+# Registration number patterns, compiled once for every parse
+_RA_RE = re.compile(r'RA\d{10}')
+_RA_RE_BOUNDED = re.compile(r'\bRA\d{10}\b')
+
+# Timetable slot and batch patterns
+_SLOT_PP_RE = re.compile(r'P\d+-P\d+-')
+_SLOT_PREFIX_RE = re.compile(r'(P)(\d+)-')
+_SLOT_PNUM_RE = re.compile(r'(P\d+)-')
+_SLOT_NUM_RE = re.compile(r'(\d+)-')
+_BATCH_NUM_RE = re.compile(r'(\d+)')
+_BATCH_TD_RE = re.compile(r'Batch:?\s*</td>\s*<td[^>]*>\s*(\d+)\s*</td>', re.IGNORECASE)
+_BATCH_XPATH = (
+    "//td[contains(., 'Batch')]/following-sibling::td[1]"
+    " | //strong[string-length(normalize-space(.))=1 and translate(normalize-space(.), '0123456789', '')='']"
+)
+_BATCH_SELECTOR = "td:-soup-contains('Batch') + td, strong"
+
+# Time slots, indexed by slot number - 1 (for display only)
+SLOT_TIMES = (
+    "08:00-08:50",
+    "08:50-09:40",
+    "09:45-10:35",
+    "10:40-11:30",
+    "11:35-12:25",
+    "12:30-01:20",
+    "01:25-02:15",
+    "02:20-03:10",
+    "03:10-04:00",
+    "04:00-04:50",
+    "04:50-05:30",
+    "05:30-06:10",
+)
+
+DAY_NAMES = ("Day 1", "Day 2", "Day 3", "Day 4", "Day 5")
+
+# Hard-coded official timetables for two batches, indexed [day - 1][slot - 1]
+BATCH_1_TIMETABLE = (
+    ("A", "A/X", "F/X", "F", "G", "P6-", "P7-", "P8-", "P9-", "P10-", "L11", "L11"),
+    ("P11-", "P12-/X", "P13-/X", "P14-", "P15-", "B", "B", "G", "G", "A", "L21", "L22"),
+    ("C", "C/X", "A/X", "D", "B", "P26-", "P27-", "P28-", "P29-", "P30-", "L31", "L32"),
+    ("P31-", "P32-/X", "P33-/X", "P34-", "P35-", "D", "D", "B", "E", "C", "L41", "L42"),
+    ("E", "E/X", "C/X", "F", "D", "P46-", "P47-", "P48-", "P49-", "P50-", "L51", "L52"),
+)
+
+BATCH_2_TIMETABLE = (
+    ("P1-", "P2-/X", "P3-/X", "P4-", "P5-", "A", "A", "F", "F", "G", "L11", "L12"),
+    ("B", "B/X", "G/X", "G", "A", "P16-", "P17-", "P18-", "P19-", "P20-", "L21", "L22"),
+    ("P21-", "P22-/X", "P23-/X", "P24-", "P25-", "C", "C", "A", "D", "B", "L31", "L32"),
+    ("D", "D/X", "B/X", "E", "C", "P36-", "P37-", "P38-", "P39-", "P40-", "L41", "L42"),
+    ("P41-", "P42-/X", "P43-/X", "P44-", "P45-", "E", "E", "C", "F", "D", "L51", "L52"),
+)
+
+def _timetable_slot_codes(timetable):
+    """Every slot code in a batch timetable, with "/X" alternates split out"""
+    return frozenset(
+        part.strip()
+        for slots in timetable
+        for slot_code in slots
+        for part in slot_code.split("/")
+        if part.strip()
+    )
+
+def _flatten_timetable(timetable):
+    """
+    Pair each day and slot with its labels ahead of time: (day, ((time_slot, slot_code, parts), ...)).
+    parts holds the "/X" alternates of a combined slot and is None for a single code.
+    """
+    return tuple(
+        (day, tuple(
+            (time_slot, slot_code, tuple(p.strip() for p in slot_code.split("/") if p.strip()) if "/" in slot_code else None)
+            for time_slot, slot_code in zip(SLOT_TIMES, slots)
+        ))
+        for day, slots in zip(DAY_NAMES, timetable)
+    )
+
+_TIMETABLE_BY_BATCH = {"1": BATCH_1_TIMETABLE, "2": BATCH_2_TIMETABLE}
+_SLOT_CODES_BY_BATCH = {batch: _timetable_slot_codes(tt) for batch, tt in _TIMETABLE_BY_BATCH.items()}
+_TIMETABLE_CELLS_BY_BATCH = {batch: _flatten_timetable(tt) for batch, tt in _TIMETABLE_BY_BATCH.items()}
+
+# Timetable table columns, in the order scrape_timetable unpacks their indices
+_TT_COLS = ("Course Code", "Course Title", "Slot", "GCR Code", "Faculty", "Course Type", "Room")
+
+# Subresources the scraper never reads; blocked so pages settle sooner
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp", "*.mp4",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*",
+]
+
+def _unwrap_zoho_page(body):
+    """Extract the page HTML from a Zoho Creator page response; plain HTML is returned unchanged"""
+    match = _PAGE_SANITIZE_RE.search(body)
+    if not match:
+        return body
+    return _HEX_ESCAPE_RUN_RE.sub(_decode_hex_escapes, match.group(1))
+
+def _decode_hex_escapes(match):
+    """Decode a run of \\xNN escapes as UTF-8, falling back to Latin-1 for byte runs that aren't valid UTF-8"""
+    raw = bytes.fromhex(match.group(0).replace("\\x", ""))
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+def _tables_containing(soup, text):
+    """
+    Tables whose text includes `text`, outermost first and in document order.
+    Walks up from the matching text nodes instead of stringifying every table in the page.
+    """
+    tables = {}
+    for node in soup.find_all(string=lambda s: text in s):
+        for table in reversed(node.find_parents("table")):
+            tables.setdefault(id(table), table)
+    return list(tables.values())
 
-# Time slots mapping (for display only)
-slot_times = {
-    "1": "08:00-08:50",
-    "2": "08:50-09:40",
-    "3": "09:45-10:35",
-    "4": "10:40-11:30",
-    "5": "11:35-12:25",
-    "6": "12:30-01:20",
-    "7": "01:25-02:15",
-    "8": "02:20-03:10",
-    "9": "03:10-04:00",
-    "10": "04:00-04:50",
-    "11": "04:50-05:30",
-    "12": "05:30-06:10"
-}
+def attendance_row_texts(soup):
+    """
+    Cell text of every attendance row with at least 8 cells, header rows skipped; None if no table matched.
+    Reads the already-parsed page so the attendance HTML is only parsed once per scrape.
+    """
+    tables = _tables_containing(soup, "Course Code")
+    if not tables:
+        return None
+    row_texts = []
+    for table in tables:
+        for row in table.find_all("tr")[1:]:  # skip header row
+            cols = row.find_all("td")
+            if len(cols) >= 8:
+                row_texts.append(tuple(col.get_text().strip() for col in cols[:8]))
+    return row_texts
+
+def find_registration_number(soup):
+    """Registration number from a parsed page, or None; no logging or debug dumps"""
+    # Method 1: Meta tag extraction
+    meta_tag = soup.select_one('meta[name="registration-number"][content]')
+    if meta_tag and (match := _RA_RE.search(meta_tag['content'])):
+        return match.group(0)
+    
+    # Method 2: Data attribute in profile section
+    profile_div = soup.select_one('div.profile-info[data-registration]')
+    if profile_div and (data_reg := profile_div['data-registration'].strip()):
+        return data_reg
+    
+    # Method 3: Updated table structure parsing (value cell right after a "Registration" label cell)
+    for cell in soup.select("table.profile-table tr > td:first-child:-soup-contains('Registration') + td"):
+        if match := _RA_RE.search(cell.get_text(strip=True)):
+            return match.group(0)
+    
+    # Method 4: Hidden input field fallback
+    hidden_input = soup.select_one('input[name="reg_number"][value]')
+    if hidden_input and (value := hidden_input['value'].strip()):
+        return value
+    
+    # Final fallback: Aggressive text search
+    if match := _RA_RE_BOUNDED.search(soup.get_text()):
+        return match.group(0)
+    return None
+
+def _to_int(text, default=0):
+    try:
+        return int(text)
+    except ValueError:
+        return default
+
+def _to_float(text, default=0.0):
+    try:
+        return float(text)
+    except ValueError:
+        return default
+
+def _expand_slot(slot):
+    """
+    Expand a course's slot string into the official-timetable keys it occupies.
+    Returns (keys, lab_codes); lab_codes is None unless the slot is a multi-slot lab.
+    """
+    # Regular slots with possible "/X" format
+    if "/" in slot and "-" not in slot:
+        return [part.strip() for part in slot.split("/") if part.strip()], None
+
+    # Multi-slot lab courses, either "P37-P38-P39-" or "P37-38-39-" (without repeating P)
+    if "-" in slot:
+        if _SLOT_PP_RE.search(slot):
+            lab_codes = [code.strip() + "-" for code in _SLOT_PNUM_RE.findall(slot)]
+        else:
+            prefix_match = _SLOT_PREFIX_RE.match(slot)
+            lab_codes = []
+            if prefix_match:
+                prefix = prefix_match.group(1)
+                lab_codes = [prefix + num + "-" for num in _SLOT_NUM_RE.findall(slot)]
+        # The full original slot is registered too, for reference
+        return lab_codes + [slot], lab_codes
+
+    # Regular single slot
+    return [slot], None
+
+def _pick_batch(candidates):
+    """Choose the batch from (tag, text) candidates; label cells take priority over lone-digit <strong> tags"""
+    for wanted in ("td", "strong"):
+        for tag, batch_text in candidates:
+            if tag == wanted and batch_text.isdigit() and (tag == "td" or len(batch_text) == 1):
+                return batch_text
+    return None
+
+def parse_attendance_rows(row_texts):
+    """
+    Build attendance records from 8-cell text tuples, keeping the first row per (course, category).
+    Works on plain strings only, so it stays independent of the HTML parser.
+    """
+    unique_records = {}
+    for code, title, category, faculty, slot, conducted, absent, percentage in row_texts:
+        key = (code, category)
+        if key in unique_records:
+            continue
+        try:
+            unique_records[key] = {
+                "course_code": code,
+                "course_title": title,
+                "category": category,
+                "faculty": faculty,
+                "slot": slot,
+                "hours_conducted": _to_int(conducted),
+                "hours_absent": _to_int(absent),
+                "attendance_percentage": _to_float(percentage)
+            }
+        except Exception as ex:
+            logger.warning(f"Error parsing row: {ex}")
+    return list(unique_records.values())
+
+CHROME_ARGUMENTS = (
+    # Required arguments for headless mode
+    '--headless=new',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    # Trim per-instance memory so more browsers fit on one host
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-features=Translate,BackForwardCache,MediaRouter',
+    '--blink-settings=imagesEnabled=false',
+    '--js-flags=--max-old-space-size=256',
+    # Two renderers, not one: a unified run loads the timetable in a background tab while
+    # attendance is scraped, and a single shared renderer would serialize both pages again
+    '--renderer-process-limit=2',
+    # Skip first-run, sync and background work that a scraping session never uses
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-default-apps',
+    '--no-first-run',
+    '--mute-audio',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-ipc-flooding-protection',
+)
+
+_CHROMEDRIVER_PATH = None
+
+def chromedriver_path():
+    """
+    Resolve the ChromeDriver binary once per process.
+    Uses the driver baked into the image; webdriver-manager (a network lookup) is only
+    consulted when that binary is missing, e.g. on a developer machine.
+    """
+    global _CHROMEDRIVER_PATH
+    if _CHROMEDRIVER_PATH is None:
+        path = os.getenv("CHROMEDRIVER_PATH", "/usr/local/bin/chromedriver")
+        if not os.path.exists(path):
+            logger.warning(f"ChromeDriver not found at {path}; resolving with webdriver-manager")
+            path = ChromeDriverManager().install()
+        _CHROMEDRIVER_PATH = path
+        logger.info(f"Using ChromeDriver at: {path}")
+    return _CHROMEDRIVER_PATH
+
+# Selenium Grid hub (e.g. http://selenium-hub:4444/wd/hub); when set, browsers run on grid nodes
+SELENIUM_GRID_URL = os.getenv("SELENIUM_GRID_URL")
+
+class GridChrome(webdriver.Remote):
+    """Remote Chrome on a Selenium Grid node that still speaks CDP through chromedriver's goog/cdp endpoint"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.command_executor._commands["executeCdpCommand"] = ("POST", "/session/$sessionId/goog/cdp/execute")
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+def create_driver():
+    """Setup Chrome with explicit ChromeDriver path, or on the Selenium Grid when SELENIUM_GRID_URL is set"""
+    try:
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.arguments.extend(CHROME_ARGUMENTS)
+        
+        # Point at chrome-headless-shell when the image provides it
+        chrome_binary = os.getenv("CHROME_BINARY")
+        if chrome_binary and not SELENIUM_GRID_URL:
+            chrome_options.binary_location = chrome_binary
+        
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        
+        # Return from driver.get() at DOMContentLoaded; callers wait for the elements they need
+        chrome_options.page_load_strategy = 'eager'
+        
+        if SELENIUM_GRID_URL:
+            driver = GridChrome(command_executor=SELENIUM_GRID_URL, options=chrome_options)
+        else:
+            # Explicitly specify the service with the driver path
+            service = Service(executable_path=chromedriver_path())
+            
+            # Initialize Chrome with the service
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+        
+        # Drop images, fonts, stylesheets and trackers at the network layer
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        
+        # Log Chrome version for debugging
+        version = driver.capabilities.get('browserVersion', 'unknown')
+        logger.info(f"✅ Chrome initialized successfully (version: {version})")
+        
+        return driver
+        
+    except Exception as e:
+        logger.error(f"❌ Chrome initialization failed: {e}")
+        return None
 
-# Hard-coded official timetables for two batches
-batch_1_timetable = {
-    "Day 1": {
-        slot_times["1"]: "A", slot_times["2"]: "A/X", slot_times["3"]: "F/X", slot_times["4"]: "F",
-        slot_times["5"]: "G", slot_times["6"]: "P6-", slot_times["7"]: "P7-", slot_times["8"]: "P8-",
-        slot_times["9"]: "P9-", slot_times["10"]: "P10-", slot_times["11"]: "L11", slot_times["12"]: "L11"
-    },
-    "Day 2": {
-        slot_times["1"]: "P11-", slot_times["2"]: "P12-/X", slot_times["3"]: "P13-/X", slot_times["4"]: "P14-",
-        slot_times["5"]: "P15-", slot_times["6"]: "B", slot_times["7"]: "B", slot_times["8"]: "G",
-        slot_times["9"]: "G", slot_times["10"]: "A", slot_times["11"]: "L21", slot_times["12"]: "L22"
-    },
-    "Day 3": {
-        slot_times["1"]: "C", slot_times["2"]: "C/X", slot_times["3"]: "A/X", slot_times["4"]: "D",
-        slot_times["5"]: "B", slot_times["6"]: "P26-", slot_times["7"]: "P27-", slot_times["8"]: "P28-",
-        slot_times["9"]: "P29-", slot_times["10"]: "P30-", slot_times["11"]: "L31", slot_times["12"]: "L32"
-    },
-    "Day 4": {
-        slot_times["1"]: "P31-", slot_times["2"]: "P32-/X", slot_times["3"]: "P33-/X", slot_times["4"]: "P34-",
-        slot_times["5"]: "P35-", slot_times["6"]: "D", slot_times["7"]: "D", slot_times["8"]: "B",
-        slot_times["9"]: "E", slot_times["10"]: "C", slot_times["11"]: "L41", slot_times["12"]: "L42"
-    },
-    "Day 5": {
-        slot_times["1"]: "E", slot_times["2"]: "E/X", slot_times["3"]: "C/X", slot_times["4"]: "F",
-        slot_times["5"]: "D", slot_times["6"]: "P46-", slot_times["7"]: "P47-", slot_times["8"]: "P48-",
-        slot_times["9"]: "P49-", slot_times["10"]: "P50-", slot_times["11"]: "L51", slot_times["12"]: "L52"
-    }
-}
+def set_session_cookies(driver, cookies):
+    """Restore Academia session cookies with a single CDP call instead of one add_cookie per cookie"""
+    driver.execute_cdp_cmd('Network.setCookies', {
+        'cookies': [{'name': name, 'value': value, 'url': BASE_URL} for name, value in cookies.items()]
+    })
 
-batch_2_timetable = {
-    "Day 1": {
-        slot_times["1"]: "P1-", slot_times["2"]: "P2-/X", slot_times["3"]: "P3-/X", slot_times["4"]: "P4-",
-        slot_times["5"]: "P5-", slot_times["6"]: "A", slot_times["7"]: "A", slot_times["8"]: "F",
-        slot_times["9"]: "F", slot_times["10"]: "G", slot_times["11"]: "L11", slot_times["12"]: "L12"
-    },
-    "Day 2": {
-        slot_times["1"]: "B", slot_times["2"]: "B/X", slot_times["3"]: "G/X", slot_times["4"]: "G",
-        slot_times["5"]: "A", slot_times["6"]: "P16-", slot_times["7"]: "P17-", slot_times["8"]: "P18-",
-        slot_times["9"]: "P19-", slot_times["10"]: "P20-", slot_times["11"]: "L21", slot_times["12"]: "L22"
-    },
-    "Day 3": {
-        slot_times["1"]: "P21-", slot_times["2"]: "P22-/X", slot_times["3"]: "P23-/X", slot_times["4"]: "P24-",
-        slot_times["5"]: "P25-", slot_times["6"]: "C", slot_times["7"]: "C", slot_times["8"]: "A",
-        slot_times["9"]: "D", slot_times["10"]: "B", slot_times["11"]: "L31", slot_times["12"]: "L32"
-    },
-    "Day 4": {
-        slot_times["1"]: "D", slot_times["2"]: "D/X", slot_times["3"]: "B/X", slot_times["4"]: "E",
-        slot_times["5"]: "C", slot_times["6"]: "P36-", slot_times["7"]: "P37-", slot_times["8"]: "P38-",
-        slot_times["9"]: "P39-", slot_times["10"]: "P40-", slot_times["11"]: "L41", slot_times["12"]: "L42"
-    },
-    "Day 5": {
-        slot_times["1"]: "P41-", slot_times["2"]: "P42-/X", slot_times["3"]: "P43-/X", slot_times["4"]: "P44-",
-        slot_times["5"]: "P45-", slot_times["6"]: "E", slot_times["7"]: "E", slot_times["8"]: "C",
-        slot_times["9"]: "F", slot_times["10"]: "D", slot_times["11"]: "L51", slot_times["12"]: "L52"
-    }
-}
+# WebDriver's default session timeouts, restored when a driver goes back to the pool
+DEFAULT_PAGE_LOAD_TIMEOUT = 300
+DEFAULT_SCRIPT_TIMEOUT = 30
+
+class WebDriverPool:
+    """
+    Thread-safe pool of headless Chrome drivers.
+    Drivers are reset and handed back out instead of paying Chrome startup per request,
+    and replaced after max_uses checkouts so a long-lived Chrome can't accumulate leaks.
+    """
+    def __init__(self, max_size, timeout=120, max_uses=50):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        # Idle drivers (used as a LIFO stack) and the live-driver count share one condition,
+        # so a waiter wakes both when a driver is returned and when a discard frees a slot
+        self._idle = []
+        self._cond = threading.Condition()
+        self._created = 0
+        self._uses = {}
+
+    def get(self, blocking=True):
+        """
+        Check out an idle driver, launching a new one while under capacity.
+        With blocking=False, returns None instead of waiting when every driver is checked out.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.max_size:
+                    self._created += 1
+                    break
+                if not blocking:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"No Chrome driver available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        # Launch outside the lock; Chrome startup takes seconds
+        driver = create_driver()
+        if driver is None:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise RuntimeError("Failed to initialize Chrome driver")
+        return driver
+
+    def put(self, driver):
+        """Reset session state and return a driver to the pool"""
+        with self._cond:
+            uses = self._uses.get(driver, 0) + 1
+            self._uses[driver] = uses
+        if uses >= self.max_uses:
+            logger.info(f"♻️ Recycling pooled driver after {uses} uses")
+            self.discard(driver)
+            return
+        try:
+            # CDP clears cookies for every domain, not just the current page's
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            # Undo apply_timeouts so the next borrower's explicit waits poll without a 10s implicit wait
+            driver.implicitly_wait(0)
+            driver.set_page_load_timeout(DEFAULT_PAGE_LOAD_TIMEOUT)
+            driver.set_script_timeout(DEFAULT_SCRIPT_TIMEOUT)
+            driver.get("about:blank")
+        except Exception as e:
+            logger.warning(f"Discarding pooled driver that failed to reset: {e}")
+            self.discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    def discard(self, driver):
+        """Quit a broken driver and free its slot"""
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._created -= 1
+            self._uses.pop(driver, None)
+            self._cond.notify()
+
+    def shutdown(self):
+        """Quit every idle driver so no Chrome or chromedriver process outlives the interpreter"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self.discard(driver)
+
+    @contextmanager
+    def acquire(self, blocking=True):
+        driver = self.get(blocking)
+        if driver is None:
+            yield None
+            return
+        try:
+            yield driver
+        finally:
+            self.put(driver)
+
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", 2))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", 50))
+driver_pool = WebDriverPool(DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES)
+atexit.register(driver_pool.shutdown)
 
 class SRMScraper:
     """
     Unified scraper for SRM Academia portal data.
     Handles both timetable and attendance scraping with a single browser session.
     """
-    def __init__(self, email, password):
-        self.driver = None
+    def __init__(self, email, password, driver=None):
+        self.driver = driver
+        # A driver passed in belongs to the caller; one checked out by setup_driver goes back to the pool
+        self._owns_driver = driver is None
         self.is_logged_in = False
+        # True only once this browser has signed in itself; injected cookies carry no trustworthy expiry
+        self._session_verified = False
         self.email = email
         self.password = password
+        # Per-run results reused by later steps instead of re-querying Supabase
+        self._registration_number = None
+        self._user_id = None
+        self._last_attendance_records = None
+        self._timetable_soup = None
+        # Latest full page source read from the driver, reused instead of re-serialising the DOM
+        self._last_page_source = None
+        # Background tab preloading the timetable during a unified run, and the tab to return to
+        self._timetable_handle = None
+        self._main_handle = None
         
     def setup_driver(self):
-        """Setup Chrome with explicit ChromeDriver path"""
+        """Check out a warm Chrome from the shared driver pool"""
         try:
-            chrome_options = webdriver.ChromeOptions()
-            
-            # Required arguments for headless mode
-            chrome_options.add_argument('--headless=new')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            
-            # Use explicit ChromeDriver path
-            chrome_driver_path = "/usr/local/bin/chromedriver"
-            logger.info(f"Using ChromeDriver at: {chrome_driver_path}")
-            
-            # Explicitly specify the service with the driver path
-            service = Service(executable_path=chrome_driver_path)
-            
-            # Initialize Chrome with the service
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Log Chrome version for debugging
-            version = driver.capabilities.get('browserVersion', 'unknown')
-            logger.info(f"✅ Chrome initialized successfully (version: {version})")
-            
-            return driver
-            
-        except Exception as e:
-            logger.error(f"❌ Chrome initialization failed: {e}")
+            return driver_pool.get()
+        except RuntimeError as e:
+            logger.error(f"❌ {e}")
             return None
 
+    def close_driver(self):
+        """Return the browser to the pool unless it was lent to this scraper"""
+        if self.driver:
+            self.close_timetable_tab()
+        if self.driver and self._owns_driver:
+            driver_pool.put(self.driver)
+        self.driver = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        """Release the browser as soon as the with-block ends"""
+        self.close_driver()
+        self._timetable_soup = None
+        self._last_page_source = None
+        return False
+
+    def has_session_cookie(self):
+        """Check the browser's cookie jar over CDP for a live Academia session cookie"""
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        except Exception as e:
+            logger.warning(f"Could not read cookies over CDP: {e}")
+            return False
+        now = time.time()
+        for cookie in cookies:
+            if cookie["name"] in SESSION_COOKIE_NAMES and "srmist.edu.in" in cookie.get("domain", ""):
+                # Session cookies report expires <= 0 and live until the browser closes
+                if cookie.get("expires", -1) <= 0 or cookie["expires"] > now:
+                    return True
+        return False
+
     def ensure_login(self):
         """Robust login verification with multiple checks"""
         if self.is_logged_in:
+            # Fast path: a live session cookie from our own login means no page load is needed
+            if self._session_verified and self.has_session_cookie():
+                return True
             # Verify active session
             try:
                 self.driver.get(f"{BASE_URL}/#Page:Student_Profile")
                 WebDriverWait(self.driver, 10).until(
                     EC.presence_of_element_located((By.XPATH, "//h2[contains(., 'Academic Profile')]"))
                 )
+                self._session_verified = True
                 return True
             except Exception as e:
                 logger.warning(f"Session verification failed: {e}")
@@ -198,28 +782,40 @@ class SRMScraper:
                 return True
             except Exception as e:
                 logger.error(f"Post-login verification failed: {e}")
-                self.driver.save_screenshot("post_login_failure.png")
+                self.save_debug_screenshot("post_login_failure.jpg")
                 return False
         return False
     
     def create_jwt_token(self, email):
         """Create a JWT token with 30-day expiration"""
         try:
-            expiration = datetime.utcnow() + timedelta(days=30)
-            token = jwt.encode(
-                {
-                    'email': email,
-                    'exp': expiration
-                },
-                os.getenv('JWT_SECRET_KEY', 'your-secret-key'),  # Make sure to set this in .env
-                algorithm='HS256'
-            )
+            token = _sign_jwt({
+                'email': email,
+                'exp': int(time.time() + _JWT_TTL.total_seconds())
+            })
             logger.info("✅ Created JWT token with 30-day expiration")
             return token
         except Exception as e:
             logger.error(f"❌ Failed to create JWT token: {e}")
             return None
 
+    def js_fill_and_submit(self, field_id, value):
+        """Set a sign-in field, fire its input/change events and click Next with a single script call"""
+        try:
+            return bool(self.driver.execute_script("""
+                var field = document.getElementById(arguments[0]);
+                var button = document.getElementById('nextbtn');
+                if (!field || !button) { return false; }
+                field.value = arguments[1];
+                field.dispatchEvent(new Event('input', {bubbles: true}));
+                field.dispatchEvent(new Event('change', {bubbles: true}));
+                button.click();
+                return true;
+            """, field_id, value))
+        except Exception as e:
+            logger.warning(f"⚠️ JavaScript fill of {field_id} failed: {e}")
+            return False
+
     def login(self):
         """Log in to SRM Academia portal with enhanced retry logic for Render"""
         try:
@@ -236,101 +832,98 @@ class SRMScraper:
                     logger.warning(f"⚠️ Attempt {attempt+1} to switch to iframe failed: {e}")
                     if attempt == 2:  # Last attempt failed
                         raise
-                    time.sleep(2)
                 
-            # Enter email with retry
-            for attempt in range(3):
-                try:
-                    email_field = wait.until(EC.presence_of_element_located((By.ID, "login_id")))
-                    email_field.clear()  # Clear first
-                    time.sleep(0.5)
-                    email_field.send_keys(self.email)
-                    logger.info(f"Entered email: {self.email}")
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Attempt {attempt+1} to enter email failed: {e}")
-                    if attempt == 2:  # Last attempt failed
-                        raise
-                    time.sleep(2)
+            # Fill the email and click Next in one round trip; per-field retries are the fallback
+            wait.until(EC.presence_of_element_located((By.ID, "login_id")))
+            if self.js_fill_and_submit("login_id", self.email):
+                logger.info(f"Entered email and clicked Next via JavaScript: {self.email}")
+            else:
+                # Enter email with retry
+                for attempt in range(3):
+                    try:
+                        email_field = wait.until(EC.presence_of_element_located((By.ID, "login_id")))
+                        email_field.clear()  # Clear first
+                        email_field.send_keys(self.email)
+                        logger.info(f"Entered email: {self.email}")
+                        break
+                    except Exception as e:
+                        logger.warning(f"⚠️ Attempt {attempt+1} to enter email failed: {e}")
+                        if attempt == 2:  # Last attempt failed
+                            raise
 
-            # Click Next button with retry
-            for attempt in range(3):
-                try:
-                    next_btn = wait.until(EC.element_to_be_clickable((By.ID, "nextbtn")))
-                    self.driver.execute_script("arguments[0].click();", next_btn)  # JavaScript click
-                    logger.info("Clicked Next")
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Attempt {attempt+1} to click Next failed: {e}")
-                    if attempt == 2:  # Last attempt failed
-                        raise
-                    time.sleep(2)
+                # Click Next button with retry
+                for attempt in range(3):
+                    try:
+                        next_btn = wait.until(EC.element_to_be_clickable((By.ID, "nextbtn")))
+                        self.driver.execute_script("arguments[0].click();", next_btn)  # JavaScript click
+                        logger.info("Clicked Next")
+                        break
+                    except Exception as e:
+                        logger.warning(f"⚠️ Attempt {attempt+1} to click Next failed: {e}")
+                        if attempt == 2:  # Last attempt failed
+                            raise
 
-            # ===== Critical Fix: Wait longer and switch iframe context if needed =====
-            # Wait longer for the page transition to complete
-            time.sleep(2)  # Increase from 2s to 5s
-            
-            # Check if we need to switch to iframe again
+            # ===== Critical Fix: Wait for the password step and switch iframe context if needed =====
             try:
-                # First check if we're already in the correct context
-                password_field = self.driver.find_element(By.ID, "password")
-            except:
+                # First check if the password field shows up in the current context
+                WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, "password")))
+            except TimeoutException:
                 # If not, try to switch back to default and then to iframe again
                 logger.info("Switching iframe context for password field")
                 self.driver.switch_to.default_content()
                 wait.until(EC.frame_to_be_available_and_switch_to_it((By.ID, "signinFrame")))
             
-            # Enter password with retry - now with better iframe handling
-            for attempt in range(3):
-                try:
-                    # Wait explicitly for password field to be visible and interactable
-                    password_field = wait.until(
-                        EC.element_to_be_clickable((By.ID, "password"))
-                    )
-                    time.sleep(1)  # Small delay for stability
-                    password_field.clear()  # Clear first
-                    time.sleep(0.5)
-                    password_field.send_keys(self.password)
-                    logger.info("Entered password")
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Attempt {attempt+1} to enter password failed: {e}")
-                    if attempt == 2:  # Last attempt failed
-                        # Try one more approach - use JavaScript to set the value
-                        try:
-                            logger.info("Trying JavaScript approach to enter password")
-                            self.driver.execute_script(
-                                'document.getElementById("password").value = arguments[0]', 
-                                self.password
-                            )
-                            logger.info("Entered password via JavaScript")
-                        except Exception as js_error:
-                            logger.error(f"JavaScript password entry also failed: {js_error}")
+            # Fill the password and click Sign In in one round trip; per-field retries are the fallback
+            wait.until(EC.element_to_be_clickable((By.ID, "password")))
+            if self.js_fill_and_submit("password", self.password):
+                logger.info("Entered password and clicked Sign In via JavaScript")
+            else:
+                # Enter password with retry - now with better iframe handling
+                for attempt in range(3):
+                    try:
+                        # Wait explicitly for password field to be visible and interactable
+                        password_field = wait.until(
+                            EC.element_to_be_clickable((By.ID, "password"))
+                        )
+                        password_field.clear()  # Clear first
+                        password_field.send_keys(self.password)
+                        logger.info("Entered password")
+                        break
+                    except Exception as e:
+                        logger.warning(f"⚠️ Attempt {attempt+1} to enter password failed: {e}")
+                        if attempt == 2:  # Last attempt failed
+                            # Try one more approach - use JavaScript to set the value
+                            try:
+                                logger.info("Trying JavaScript approach to enter password")
+                                self.driver.execute_script(
+                                    'document.getElementById("password").value = arguments[0]', 
+                                    self.password
+                                )
+                                logger.info("Entered password via JavaScript")
+                            except Exception as js_error:
+                                logger.error(f"JavaScript password entry also failed: {js_error}")
+                                raise
+
+                # Click Sign In button with retry
+                for attempt in range(3):
+                    try:
+                        sign_in_btn = wait.until(EC.element_to_be_clickable((By.ID, "nextbtn")))
+                        self.driver.execute_script("arguments[0].click();", sign_in_btn)  # JavaScript click
+                        logger.info("Clicked Sign In")
+                        break
+                    except Exception as e:
+                        logger.warning(f"⚠️ Attempt {attempt+1} to click Sign In failed: {e}")
+                        if attempt == 2:  # Last attempt failed
                             raise
-                    time.sleep(2)  # Increased wait between attempts
-
-            # Click Sign In button with retry
-            for attempt in range(3):
-                try:
-                    sign_in_btn = wait.until(EC.element_to_be_clickable((By.ID, "nextbtn")))
-                    self.driver.execute_script("arguments[0].click();", sign_in_btn)  # JavaScript click
-                    logger.info("Clicked Sign In")
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Attempt {attempt+1} to click Sign In failed: {e}")
-                    if attempt == 2:  # Last attempt failed
-                        raise
-                    time.sleep(2)
 
-            time.sleep(3)
-            
             # Switch back to default content
             self.driver.switch_to.default_content()
             
             # Verify login success
             if BASE_URL in self.driver.current_url:
                 try:
-                    WebDriverWait(self.driver, 5).until(
+                    # Dashboard link appears once the sign-in redirect completes
+                    WebDriverWait(self.driver, 15).until(
                         EC.presence_of_element_located((By.XPATH, "//a[contains(@href, 'My_Attendance')]"))
                     )
                     logger.info("✅ Login verified with dashboard elements")
@@ -347,13 +940,14 @@ class SRMScraper:
                             raise Exception("Failed to generate JWT token")
                         
                         # Save cookies and token to file for debugging
-                        debug_data = {
-                            'cookies': cookie_dict,
-                            'token': token
-                        }
-                        with open('debug_cookies.json', 'w') as f:
-                            json.dump(debug_data, f)
-                        logger.info("✅ Saved cookies and token to debug file")
+                        if _DEBUG:
+                            debug_data = {
+                                'cookies': cookie_dict,
+                                'token': token
+                            }
+                            with open('debug_cookies.json', 'wb') as f:
+                                f.write(orjson.dumps(debug_data))
+                            logger.info("✅ Saved cookies and token to debug file")
                         
                         # Store cookies and token in Supabase
                         try:
@@ -364,13 +958,11 @@ class SRMScraper:
                                 'updated_at': datetime.now().isoformat()
                             }
                             
-                            # Delete old record first
-                            supabase.table('user_cookies').delete().eq('email', self.email).execute()
-                            logger.info("✅ Deleted old cookie record")
-                            
-                            # Insert new record
-                            result = supabase.table('user_cookies').insert(cookie_data).execute()
-                            logger.info("✅ Stored new cookie record with token")
+                            # Replace any previous record for this email in one call
+                            supabase.table('user_cookies').upsert(cookie_data, on_conflict='email').execute()
+                            with _USER_COOKIE_CACHE_LOCK:
+                                _USER_COOKIE_CACHE.pop(self.email, None)
+                            logger.info("✅ Stored cookie record with token")
                             
                         except Exception as e:
                             logger.error(f"❌ Failed to store cookies and token in Supabase: {e}")
@@ -379,6 +971,7 @@ class SRMScraper:
                         logger.error(f"❌ Failed to extract/store cookies and token: {e}")
                     
                     self.is_logged_in = True
+                    self._session_verified = True
                     return True
                 except:
                     logger.warning("⚠️ Login appears successful but dashboard elements not found")
@@ -402,48 +995,66 @@ class SRMScraper:
         self.driver.get(ATTENDANCE_PAGE_URL)
         
         try:
-            # Increased wait time for slow Academia server
-            logger.info("Waiting 40 seconds for attendance page to load completely...")
-            time.sleep(40)  # Increased from 25 to 40 seconds
+            # Wait only as long as the slow Academia server actually needs (50s ceiling)
+            # The portal injects the attendance and marks tables together; either one means the page has landed
+            logger.info("Waiting for attendance table to load...")
+            WebDriverWait(
+                self.driver, 50, poll_frequency=0.5,
+                ignored_exceptions=(StaleElementReferenceException, NoSuchElementException)
+            ).until(EC.any_of(
+                EC.presence_of_element_located((By.XPATH, "//table[contains(., 'Course Code')]")),
+                EC.presence_of_element_located((By.XPATH, "//table[contains(., 'Test Performance')]"))
+            ))
             logger.info("Attendance page wait completed")
-        except Exception as e:
-            logger.warning(f"Timed out waiting for attendance page: {e}")
-            # Fallback to a longer sleep if the element isn't found
-            logger.info("Using fixed sleep time of 40 seconds")
+        except TimeoutException:
+            logger.warning("Timed out waiting for attendance table; parsing whatever has loaded")
         
-        html_source = self.driver.page_source
+        html_source = self._last_page_source = self.driver.page_source
         logger.info(f"Retrieved page source: {len(html_source)} bytes")
         return html_source
 
+    def browser_session(self):
+        """Cookies and user agent of the logged-in browser, for replaying the session over HTTP"""
+        cookies = {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+        user_agent = self.driver.execute_script("return navigator.userAgent")
+        return cookies, user_agent
+
+    def fetch_attendance_via_http(self, cookies, user_agent=None):
+        """
+        Fetch the attendance page over plain HTTP with an authenticated cookie set.
+        Returns (html_source, soup), or None if the session is rejected or the page is incomplete,
+        so callers can fall back to the browser.
+        """
+        headers = {"Referer": BASE_URL + "/"}
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        try:
+            with httpx.Client(cookies=cookies, headers=headers, timeout=20, follow_redirects=False) as client:
+                resp = client.get(ATTENDANCE_HTTP_URL)
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP attendance fetch failed: {e}; using the browser")
+            return None
+        if resp.status_code != 200:
+            logger.debug(f"HTTP attendance fetch returned {resp.status_code}; using the browser")
+            return None
+        html_source = _unwrap_zoho_page(resp.text)
+        if "Course Code" not in html_source:
+            logger.debug("HTTP attendance fetch did not include the attendance table; using the browser")
+            return None
+        # Accept the page only if the same extraction the parse uses finds the registration number.
+        # This is a probe, so a miss must not log an error or dump the page; the browser path handles that.
+        soup = BeautifulSoup(html_source, HTML_PARSER)
+        if not find_registration_number(soup):
+            logger.debug("HTTP attendance fetch did not include the registration number; using the browser")
+            return None
+        self._last_page_source = html_source
+        logger.info(f"Fetched attendance page over HTTP: {len(html_source)} bytes")
+        return html_source, soup
+
     def extract_registration_number(self, soup):
-        """Modern registration number extraction with multiple fallbacks"""
-        # Method 1: Meta tag extraction
-        meta_tag = soup.find('meta', attrs={'name': 'registration-number'})
-        if meta_tag and (content := meta_tag.get('content', '')):
-            if match := re.search(r'RA\d{10}', content):
-                return match.group(0)
-        
-        # Method 2: Data attribute in profile section
-        profile_div = soup.find('div', class_='profile-info')
-        if profile_div and (data_reg := profile_div.get('data-registration')):
-            return data_reg.strip()
-        
-        # Method 3: Updated table structure parsing
-        for row in soup.select('table.profile-table tr'):
-            tds = row.find_all('td')
-            if len(tds) >= 2 and 'Registration' in tds[0].get_text():
-                reg_text = tds[1].get_text(strip=True)
-                if match := re.search(r'RA\d{10}', reg_text):
-                    return match.group(0)
-        
-        # Method 4: Hidden input field fallback
-        hidden_input = soup.find('input', {'name': 'reg_number'})
-        if hidden_input and (value := hidden_input.get('value')):
-            return value.strip()
-        
-        # Final fallback: Aggressive text search
-        if match := re.search(r'\bRA\d{10}\b', soup.get_text()):
-            return match.group(0)
+        """Modern registration number extraction with multiple fallbacks; dumps the page when all fail"""
+        if registration_number := find_registration_number(soup):
+            return registration_number
         
         logger.error("All registration number extraction methods failed")
         self.dump_page_source("registration_error.html")
@@ -451,6 +1062,15 @@ class SRMScraper:
 
     def get_user_id(self, registration_number):
         """Get or create user ID in Supabase"""
+        if self._user_id and self._registration_number == registration_number:
+            return self._user_id
+        user_id = self._lookup_user_id(registration_number)
+        if user_id:
+            self._registration_number = registration_number
+            self._user_id = user_id
+        return user_id
+
+    def _lookup_user_id(self, registration_number):
         try:
             resp = supabase.table("users").select("id, registration_number").eq("email", self.email).single().execute()
             user = resp.data
@@ -466,7 +1086,7 @@ class SRMScraper:
         new_user = {
             "email": self.email,
             "registration_number": registration_number,
-            "password_hash": generate_password_hash("dummy_password")
+            "password_hash": _DUMMY_PWD_HASH
         }
         insert_resp = supabase.table("users").insert(new_user).execute()
         if insert_resp.data:
@@ -475,11 +1095,12 @@ class SRMScraper:
             logger.error(f"Error inserting user: {insert_resp.error}")
             return None
 
-    def parse_and_save_attendance(self, html, driver):
-        """Parse attendance data and save to Supabase"""
+    def parse_and_save_attendance(self, html, driver, soup=None):
+        """Parse attendance data and save to Supabase (pass soup to reuse an already-parsed page)"""
         try:
             logger.info("Parsing and saving attendance data...")
-            soup = BeautifulSoup(html, "html.parser")
+            if soup is None:
+                soup = BeautifulSoup(html, HTML_PARSER)
             registration_number = self.extract_registration_number(soup)
             if not registration_number:
                 logger.error("Could not find Registration Number!")
@@ -492,75 +1113,34 @@ class SRMScraper:
                 logger.error("Could not retrieve or create user in Supabase.")
                 return False
 
-            # Extract all attendance tables from the page
-            attendance_tables = [table for table in soup.find_all("table") if "Course Code" in table.text]
-            if not attendance_tables:
+            # Pull each row's cell text out of the DOM first, then build records in one tight loop
+            row_texts = attendance_row_texts(soup)
+            if row_texts is None:
                 logger.error("No attendance table found!")
                 return False
-
-            # Collect attendance records from all tables
-            attendance_records = []
-            for attendance_table in attendance_tables:
-                rows = attendance_table.find_all("tr")[1:]  # skip header row
-                for row in rows:
-                    cols = row.find_all("td")
-                    if len(cols) >= 8:
-                        try:
-                            record = {
-                                "course_code": cols[0].text.strip(),
-                                "course_title": cols[1].text.strip(),
-                                "category": cols[2].text.strip(),
-                                "faculty": cols[3].text.strip(),
-                                "slot": cols[4].text.strip(),
-                                "hours_conducted": int(cols[5].text.strip()) if cols[5].text.strip().isdigit() else 0,
-                                "hours_absent": int(cols[6].text.strip()) if cols[6].text.strip().isdigit() else 0,
-                                "attendance_percentage": float(cols[7].text.strip()) if cols[7].text.strip().replace('.', '', 1).isdigit() else 0.0
-                            }
-                            attendance_records.append(record)
-                        except Exception as ex:
-                            logger.warning(f"Error parsing row: {ex}")
-
-            # Optional: Deduplicate records if needed
-            unique_records = {}
-            for rec in attendance_records:
-                key = (registration_number, rec["course_code"], rec["category"])
-                if key not in unique_records:
-                    unique_records[key] = rec
-            attendance_records = list(unique_records.values())
+            attendance_records = parse_attendance_rows(row_texts)
             logger.info(f"Parsed {len(attendance_records)} unique attendance records.")
+            # Marks parsing maps course titles from these without reading them back
+            self._last_attendance_records = attendance_records
 
             # Build the JSON object for all attendance data
+            now_iso = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
             attendance_json = {
                 "registration_number": registration_number,
-                "last_updated": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                "last_updated": now_iso,
                 "records": attendance_records
             }
 
-            # Upsert the JSON object in Supabase
-            try:
-                sel_resp = supabase.table("attendance").select("id").eq("user_id", user_id).execute()
-            except Exception as e:
-                logger.error(f"Database operation timed out or failed: {e}")
-                sel_resp = None
-
-            if sel_resp and sel_resp.data and len(sel_resp.data) > 0:
-                up_resp = supabase.table("attendance").update({
-                    "attendance_data": attendance_json,
-                    "updated_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
-                }).eq("user_id", user_id).execute()
-                if up_resp.data:
-                    logger.info("✅ Attendance JSON updated successfully.")
-                else:
-                    logger.error("❌ Failed to update attendance JSON.")
+            # Upsert the JSON object in Supabase (one round trip, keyed on user_id)
+            up_resp = supabase.table("attendance").upsert({
+                "user_id": user_id,
+                "attendance_data": attendance_json,
+                "updated_at": now_iso
+            }, on_conflict="user_id").execute()
+            if up_resp.data:
+                logger.info("✅ Attendance JSON upserted successfully.")
             else:
-                in_resp = supabase.table("attendance").insert({
-                    "user_id": user_id,
-                    "attendance_data": attendance_json
-                }).execute()
-                if in_resp.data:
-                    logger.info("✅ Attendance JSON inserted successfully.")
-                else:
-                    logger.error("❌ Failed to insert attendance JSON.")
+                logger.error("❌ Failed to upsert attendance JSON.")
 
             return True
             
@@ -568,34 +1148,29 @@ class SRMScraper:
             logger.error(f"❌ Error saving attendance data: {e}")
             return False
 
-    def get_course_title(self, course_code, attendance_records):
+    def build_course_title_map(self, attendance_records):
         """
-        Matches course codes to course titles using the attendance records of the logged-in user.
-        Ignores case and the "Regular" suffix.
-        Returns the course title if found; otherwise, falls back to the original course code.
+        Builds a lookup of course code -> course title from the user's attendance records.
+        Keys are lowercased, both as stored and with the "Regular" suffix removed.
         """
-        if not attendance_records:
-            logger.warning("No attendance records found, using fallback course code.")
-            return course_code
-        
+        title_map = {}
         for record in attendance_records:
             stored_code = record.get("course_code", "").strip()
-            # Check for an exact match (ignoring case)
-            if stored_code.lower() == course_code.lower():
-                return record.get("course_title", course_code)
-            # Check match when "Regular" is removed
-            if stored_code.replace("Regular", "").strip().lower() == course_code.replace("Regular", "").strip().lower():
-                return record.get("course_title", course_code)
-        
-        logger.warning(f"No match found for {course_code}, using fallback course code.")
-        return course_code
+            title = record.get("course_title")
+            if not title:
+                continue
+            title_map.setdefault(stored_code.lower(), title)
+            title_map.setdefault(stored_code.replace("Regular", "").strip().lower(), title)
+        return title_map
 
-    def parse_and_save_marks(self, html, driver):
+    def parse_and_save_marks(self, html, driver, soup=None):
         """
         Scrapes the marks details from the page and upserts the data into the Supabase 'marks' table.
         This function handles any number of courses dynamically and includes multiple defense mechanisms.
+        Pass soup to reuse an already-parsed page.
         """
-        soup = BeautifulSoup(html, "html.parser")
+        if soup is None:
+            soup = BeautifulSoup(html, HTML_PARSER)
         
         # Extract registration number
         registration_number = self.extract_registration_number(soup)
@@ -610,21 +1185,25 @@ class SRMScraper:
             logger.error("Could not retrieve or create user in Supabase for marks.")
             return False
 
-        # Fetch attendance records for the CURRENT user only
-        try:
-            attendance_resp = supabase.table("attendance").select("attendance_data").eq("user_id", user_id).execute()
-        except Exception as e:
-            logger.error(f"Error fetching attendance records: {e}")
-            attendance_resp = None
-        attendance_records = []
-        if attendance_resp and attendance_resp.data and len(attendance_resp.data) > 0:
-            attendance_data = attendance_resp.data[0].get("attendance_data", {})
-            attendance_records = attendance_data.get("records", [])
+        # Use the attendance records parsed earlier in this run, else fetch the CURRENT user's
+        if self._last_attendance_records is not None:
+            attendance_records = self._last_attendance_records
+        else:
+            try:
+                attendance_resp = supabase.table("attendance").select("attendance_data").eq("user_id", user_id).execute()
+            except Exception as e:
+                logger.error(f"Error fetching attendance records: {e}")
+                attendance_resp = None
+            attendance_records = []
+            if attendance_resp and attendance_resp.data and len(attendance_resp.data) > 0:
+                attendance_data = attendance_resp.data[0].get("attendance_data", {})
+                attendance_records = attendance_data.get("records", [])
         logger.info(f"Loaded {len(attendance_records)} attendance records for user {user_id}")
+        title_map = self.build_course_title_map(attendance_records)
         
         # Locate the marks table by searching for "Test Performance"
         marks_table = None
-        for table in soup.find_all("table"):
+        for table in _tables_containing(soup, "Test Performance"):
             header = table.find("tr")
             if header and "Test Performance" in header.get_text():
                 marks_table = table
@@ -646,13 +1225,13 @@ class SRMScraper:
                     fallback_title = cells[1].get_text(strip=True)
 
                     # Try to map course title using attendance records
-                    if attendance_records:
-                        try:
-                            course_title = self.get_course_title(course_code, attendance_records)
-                        except Exception as e:
-                            logger.error(f"Error mapping course code {course_code}: {e}")
-                            course_title = fallback_title
-                    else:
+                    course_title = (
+                        title_map.get(course_code.lower())
+                        or title_map.get(course_code.replace("Regular", "").strip().lower())
+                    )
+                    if not course_title:
+                        if title_map:
+                            logger.warning(f"No match found for {course_code}, using fallback title.")
                         course_title = fallback_title
 
                     # The third cell contains a nested table with test details
@@ -695,93 +1274,136 @@ class SRMScraper:
         logger.info(f"Parsed {len(marks_records)} unique marks records.")
 
         # Build JSON object for marks data
+        now_iso = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
         marks_json = {
             "registration_number": registration_number,
-            "last_updated": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "last_updated": now_iso,
             "records": marks_records
         }
 
-        # Save data in Supabase using update/insert pattern with defense mechanisms
+        # Save data in Supabase with a single upsert keyed on user_id
         try:
-            sel_resp = supabase.table("marks").select("id").eq("user_id", user_id).execute()
-        except Exception as e:
-            logger.error(f"Error selecting marks record: {e}")
-            sel_resp = None
-
-        if sel_resp and sel_resp.data and len(sel_resp.data) > 0:
-            try:
-                up_resp = supabase.table("marks").update({
-                    "marks_data": marks_json,
-                    "updated_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
-                }).eq("user_id", user_id).execute()
-                if up_resp.data and len(up_resp.data) > 0:
-                    logger.info("Marks JSON updated successfully.")
-                else:
-                    raise Exception("Update returned no data")
-            except Exception as update_err:
-                logger.error(f"Update failed; trying insert as fallback: {update_err}")
-                try:
-                    in_resp = supabase.table("marks").insert({
-                        "user_id": user_id,
-                        "marks_data": marks_json
-                    }).execute()
-                    if in_resp.data and len(in_resp.data) > 0:
-                        logger.info("Marks JSON inserted successfully as fallback.")
-                    else:
-                        raise Exception("Fallback insert failed")
-                except Exception as insert_err:
-                    logger.error(f"Final failure in saving marks JSON: {insert_err}")
-                    return False
-        else:
-            try:
-                in_resp = supabase.table("marks").insert({
-                    "user_id": user_id,
-                    "marks_data": marks_json
-                }).execute()
-                if in_resp.data and len(in_resp.data) > 0:
-                    logger.info("Marks JSON inserted successfully.")
-                else:
-                    raise Exception("Insert returned no data")
-            except Exception as insert_err:
-                logger.error(f"Initial insert failed: {insert_err}")
-                return False
+            up_resp = supabase.table("marks").upsert({
+                "user_id": user_id,
+                "marks_data": marks_json,
+                "updated_at": now_iso
+            }, on_conflict="user_id").execute()
+            if up_resp.data and len(up_resp.data) > 0:
+                logger.info("Marks JSON upserted successfully.")
+            else:
+                raise Exception("Upsert returned no data")
+        except Exception as upsert_err:
+            logger.error(f"Failed to save marks JSON: {upsert_err}")
+            return False
 
         return True
 
     # TIMETABLE SCRAPER METHODS
 
+    def prefetch_timetable_tab(self):
+        """
+        Start loading the timetable in a background tab so it renders while another page is scraped.
+        get_timetable_page switches to this tab instead of navigating; WebDriver calls stay sequential.
+        """
+        try:
+            self._main_handle = self.driver.current_window_handle
+            target = self.driver.execute_cdp_cmd("Target.createTarget", {"url": TIMETABLE_URL, "background": True})
+            # chromedriver uses the CDP target id as the window handle
+            if target["targetId"] in self.driver.window_handles:
+                self._timetable_handle = target["targetId"]
+                logger.info("Preloading timetable in a background tab")
+                return True
+            self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": target["targetId"]})
+        except Exception as e:
+            logger.warning(f"Could not open timetable tab: {e}")
+        return False
+
+    def close_timetable_tab(self):
+        """Close the preloaded timetable tab, if any, and return to the original tab"""
+        if not self._timetable_handle:
+            return
+        try:
+            self.driver.switch_to.window(self._timetable_handle)
+            self.driver.close()
+            self.driver.switch_to.window(self._main_handle)
+        except Exception as e:
+            logger.warning(f"Could not close timetable tab: {e}")
+        self._timetable_handle = None
+
     def get_timetable_page(self):
         """Navigate to timetable page and get HTML with increased timeout"""
         if not self.ensure_login():
             return None
         
-        logger.info(f"Navigating to timetable page: {TIMETABLE_URL}")
-        self.driver.get(TIMETABLE_URL)
+        if self._timetable_handle:
+            logger.info("Switching to preloaded timetable tab")
+            self.driver.switch_to.window(self._timetable_handle)
+        else:
+            logger.info(f"Navigating to timetable page: {TIMETABLE_URL}")
+            self.driver.get(TIMETABLE_URL)
         
-        # Increased wait time for slow Academia server
-        logger.info("Waiting 40 seconds for timetable page to load completely...")
-        time.sleep(40)  # Increased from 22 to 40 seconds
-        logger.info("Timetable page wait completed")
+        # Wait until the course table renders instead of a fixed 40s; the Academia server is slow but not always
+        logger.info("Waiting for timetable table to load...")
+        try:
+            WebDriverWait(self.driver, 60, poll_frequency=0.5).until(EC.any_of(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "table.course_tbl tr td")),
+                EC.text_to_be_present_in_element((By.TAG_NAME, "body"), "Course Code")
+            ))
+            logger.info("Timetable page wait completed")
+        except TimeoutException:
+            logger.warning("Timed out waiting for timetable table; parsing whatever has loaded")
         
-        html_source = self.driver.page_source
+        html_source = self._last_page_source = self.driver.page_source
         logger.info(f"Retrieved timetable page source: {len(html_source)} bytes")
         return html_source
 
+    def save_debug_screenshot(self, filename):
+        """Save a compressed viewport JPEG over CDP when SCRAPER_DEBUG=1; a no-op otherwise"""
+        if not _DEBUG:
+            return
+        try:
+            shot = self.driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "jpeg", "quality": 50})
+            with open(filename, "wb") as f:
+                f.write(base64.b64decode(shot["data"]))
+            logger.info(f"Saved debug screenshot to {filename}")
+        except Exception as e:
+            logger.warning(f"Could not save debug screenshot: {e}")
+
     def dump_page_source(self, filename="debug_page_source.html", num_chars=1000):
         """
         Writes the first 'num_chars' characters of the page source to a file.
         If you need the full source, set num_chars to None.
         """
-        source = self.driver.page_source if num_chars is None else self.driver.page_source[:num_chars]
+        if self.driver is None:
+            # Browser-free scrapes only have the fetched source
+            source = (self._last_page_source or "")[:num_chars]
+        elif num_chars is None:
+            source = self.driver.page_source
+        else:
+            # Slice in the browser so only the requested prefix crosses the WebDriver connection
+            source = self.driver.execute_script(
+                "return document.documentElement.outerHTML.substr(0, arguments[0]);", num_chars
+            )
         with open(filename, "w", encoding="utf-8") as f:
             f.write(source)
         logger.info(f"Page source snippet dumped to {filename}")
 
-    def parse_batch_number_from_page(self):
+    def parse_batch_number_from_page(self, soup=None):
         """
         Extract batch number from either timetable or attendance page HTML.
+        An already-parsed soup of the page is checked first, before waiting on the live page.
         Returns the batch number as a string or None if not found.
         """
+        # The source already read for this page usually has it; no wait and no second serialisation
+        if self._last_page_source:
+            match = _BATCH_TD_RE.search(self._last_page_source)
+            if match:
+                return match.group(1)
+        if soup is not None:
+            batch = _pick_batch([(node.name, node.get_text(strip=True)) for node in soup.select(_BATCH_SELECTOR)])
+            if batch:
+                return batch
+
         try:
             WebDriverWait(self.driver, 50).until(
                 EC.presence_of_element_located((By.XPATH, "//*[contains(text(),'Batch')]"))
@@ -790,49 +1412,42 @@ class SRMScraper:
             logger.warning(f"Timeout waiting for batch element: {e}")
             # We'll try to parse from the current page source anyway
 
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        
-        # Method 1: Look for a table cell with "Batch:" label
-        batch_label = soup.find("td", string=lambda text: text and "Batch:" in text)
-        if batch_label:
-            next_cell = batch_label.find_next("td")
-            if next_cell:
-                batch_text = next_cell.get_text(strip=True)
-                if batch_text and batch_text.isdigit():
-                    return batch_text
-        
-        # Method 2: Look for a table row with batch information
-        batch_td = soup.find("td", string=lambda text: text and "Batch" in text and ":" not in text)
-        if batch_td:
-            # The batch number might be in the next cell
-            next_td = batch_td.find_next("td")
-            if next_td:
-                batch_text = next_td.get_text(strip=True)
-                if batch_text and batch_text.isdigit():
-                    return batch_text
+        page_source = self._last_page_source = self.driver.page_source
         
-        # Method 3: Look for a specific pattern in the HTML
-        batch_rows = soup.find_all("tr")
-        for row in batch_rows:
-            cells = row.find_all("td")
-            for i, cell in enumerate(cells):
-                if "Batch" in cell.get_text() and i+1 < len(cells):
-                    batch_text = cells[i+1].get_text(strip=True)
-                    if batch_text and batch_text.isdigit():
-                        return batch_text
-        
-        # Method 4: Use regex to find batch number pattern in the HTML
-        batch_pattern = re.compile(r'Batch:?\s*</td>\s*<td[^>]*>\s*(\d+)\s*</td>', re.IGNORECASE)
-        match = batch_pattern.search(str(soup))
+        # Cheapest check first: the "Batch:" label cell followed by a number cell, straight off the raw HTML
+        match = _BATCH_TD_RE.search(page_source)
         if match:
             return match.group(1)
         
-        # Method 5: Look for strong tag with batch number
-        batch_strong = soup.find("strong", string=lambda text: text and text.isdigit() and len(text.strip()) == 1)
-        if batch_strong:
-            return batch_strong.get_text(strip=True)
+        # Otherwise one query for both candidates: the cell after a "Batch" cell, and a lone-digit <strong>
+        candidates = None
+        if lxml_html is not None:
+            try:
+                nodes = lxml_html.fromstring(page_source).xpath(_BATCH_XPATH)
+                candidates = [(node.tag, node.text_content().strip()) for node in nodes]
+            except Exception as e:
+                logger.warning(f"lxml batch lookup failed, falling back to BeautifulSoup: {e}")
+        if candidates is None:
+            soup = BeautifulSoup(page_source, HTML_PARSER)
+            candidates = [(node.name, node.get_text(strip=True)) for node in soup.select(_BATCH_SELECTOR)]
         
-        return None
+        return _pick_batch(candidates)
+
+    def refresh_timetable_soup(self):
+        """
+        Wait up to 5s for the course table's first data row to render, then parse only the table's outerHTML.
+        Falls back to the full page source when the page uses a different table layout.
+        The wait doubles as the backoff between extraction retries, so it must not pass on a header-only table.
+        """
+        try:
+            WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "table.course_tbl tr:nth-of-type(2) td"))
+            )
+            table_el = self.driver.find_element(By.CSS_SELECTOR, "table.course_tbl")
+            return BeautifulSoup(table_el.get_attribute("outerHTML"), HTML_PARSER)
+        except TimeoutException:
+            self._last_page_source = self.driver.page_source
+            return BeautifulSoup(self._last_page_source, HTML_PARSER)
 
     def scrape_timetable(self):
         """
@@ -844,19 +1459,23 @@ class SRMScraper:
             
         max_retries = 3
         extracted_rows = []
+        # Parse the source we already have; re-read the DOM only when a retry needs a fresher copy
+        soup = BeautifulSoup(html_source, HTML_PARSER)
+        # Kept so batch detection can read the same full-page tree
+        self._timetable_soup = soup
         
         for attempt in range(max_retries):
             logger.info(f"Attempt {attempt+1}: Extracting timetable table...")
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+            if attempt > 0:
+                soup = self.refresh_timetable_soup()
             
             # Attempt to find the timetable
-            table = soup.find("table", class_="course_tbl")
+            table = soup.select_one("table.course_tbl")
             if not table:
                 # Some pages have a different class or structure
-                for t in soup.find_all("table"):
-                    if "Course Code" in t.get_text():
-                        table = t
-                        break
+                candidates = _tables_containing(soup, "Course Code")
+                if candidates:
+                    table = candidates[0]
 
             if table:
                 try:
@@ -866,24 +1485,23 @@ class SRMScraper:
                     header_cells = rows[0].find_all(["th", "td"])
                     headers = [cell.get_text(strip=True) for cell in header_cells]
 
-                    def col_index(name):
-                        for i, h in enumerate(headers):
-                            if name in h:
-                                return i
-                        return -1
+                    # Resolve every column in one walk over the header; first matching header wins
+                    indices = dict.fromkeys(_TT_COLS, -1)
+                    for i, h in enumerate(headers):
+                        for name in _TT_COLS:
+                            if indices[name] == -1 and name in h:
+                                indices[name] = i
+
+                    idx_code, idx_title, idx_slot, idx_gcr, idx_faculty, idx_ctype, idx_room = (
+                        indices[name] for name in _TT_COLS
+                    )
 
-                    idx_code = col_index("Course Code")
-                    idx_title = col_index("Course Title")
-                    idx_slot = col_index("Slot")
-                    idx_gcr = col_index("GCR Code")
-                    idx_faculty = col_index("Faculty")
-                    idx_ctype = col_index("Course Type")
-                    idx_room = col_index("Room")
+                    min_cells = max(idx_code, idx_title, idx_slot, idx_faculty, idx_ctype, idx_room)
 
                     data_rows = []
                     for row in rows[1:]:
                         cells = row.find_all("td")
-                        if len(cells) > max(idx_code, idx_title, idx_slot, idx_faculty, idx_ctype, idx_room):
+                        if len(cells) > min_cells:
                             course_code = cells[idx_code].get_text(strip=True)
                             course_title = cells[idx_title].get_text(strip=True)
                             slot = cells[idx_slot].get_text(strip=True)
@@ -910,8 +1528,6 @@ class SRMScraper:
                 except Exception as e:
                     logger.warning(f"Error parsing table on attempt {attempt+1}: {e}")
 
-            time.sleep(5)
-
         if not extracted_rows:
             logger.error("Failed to extract timetable table after retries.")
         return extracted_rows
@@ -929,115 +1545,71 @@ class SRMScraper:
         Merge course data with the appropriate timetable format based on batch
         """
         # Determine student's batch
-        student_batch = None
-        if batch_input in ["1", "2"]:
-            student_batch = f"Batch {batch_input}"
-            logger.info(f"Auto-detected batch: {student_batch}")
+        batch_num = None
+        if batch_input in _TIMETABLE_BY_BATCH:
+            batch_num = batch_input
+            logger.info(f"Auto-detected batch: Batch {batch_num}")
         elif personal_details:
             # If you already have a 'Batch' in personal_details, parse it
             raw_batch = personal_details.get("Batch", "").strip()
-            if raw_batch in ["1", "2"]:
-                student_batch = f"Batch {raw_batch}"
+            if raw_batch in _TIMETABLE_BY_BATCH:
+                batch_num = raw_batch
             else:
-                match = re.search(r'(\d+)', raw_batch)
-                if match and match.group(1) in ["1", "2"]:
-                    student_batch = f"Batch {match.group(1)}"
+                match = _BATCH_NUM_RE.search(raw_batch)
+                if match and match.group(1) in _TIMETABLE_BY_BATCH:
+                    batch_num = match.group(1)
 
         # If we still have no batch, return an error or fallback
-        if not student_batch:
+        if not batch_num:
             logger.error("Could not auto-detect batch from the page.")
             return {"status": "error", "msg": "Could not auto-detect batch (must be 1 or 2)"}
 
         # Select the official timetable based on batch
-        if "1" in student_batch:
-            official_tt = batch_1_timetable
-        elif "2" in student_batch:
-            official_tt = batch_2_timetable
-        else:
-            logger.error(f"Invalid batch: {student_batch}")
-            return {"status": "error", "msg": f"Invalid batch: {student_batch}"}
+        student_batch = f"Batch {batch_num}"
+        official_cells = _TIMETABLE_CELLS_BY_BATCH[batch_num]
 
         # Build an enhanced slot-to-course mapping with lab handling
         logger.info("Building enhanced slot to course mapping with improved lab handling...")
         enhanced_mapping = {}
         multi_slot_labs = {}  # Keep track of multi-slot lab courses
 
-        # First pass: Identify all courses and parse their slots
+        # First pass: Identify all courses and register every slot key they occupy
+        update_mapping = enhanced_mapping.update
         for course in course_data:
             slot = course.get("slot", "").strip()
             if not slot:
                 continue
 
+            get = course.get
             course_info = {
-                "title": course.get("course_title", "").strip(),
-                "faculty": course.get("faculty_name", "").strip(),
-                "room": course.get("room_no", "").strip(),
-                "code": course.get("course_code", "").strip(),
-                "type": course.get("course_type", "").strip(),
-                "gcr_code": course.get("gcr_code", "").strip()
+                "title": get("course_title", "").strip(),
+                "faculty": get("faculty_name", "").strip(),
+                "room": get("room_no", "").strip(),
+                "code": get("course_code", "").strip(),
+                "type": get("course_type", "").strip(),
+                "gcr_code": get("gcr_code", "").strip()
             }
 
-            # Handle regular slots with possible "/X" format
-            if "/" in slot and "-" not in slot:
-                slot_parts = [s.strip() for s in slot.split("/") if s.strip()]
-                for part in slot_parts:
-                    enhanced_mapping[part] = course_info
-
-            # Special handling for multi-slot lab courses like "P37-P38-P39-P40-"
-            elif "-" in slot:
-                slot_codes = []
-
-                # Split combined lab slots (handling both forms: "P37-P38-P39-" and "P37-38-39-")
-                if re.search(r'P\d+-P\d+-', slot):  # Format: P37-P38-P39-
-                    slot_parts = [s.strip() for s in re.findall(r'(P\d+)-', slot)]
-                    slot_codes.extend(slot_parts)
-                else:  # Format: P37-38-39- (without repeating P)
-                    prefix_match = re.match(r'(P)(\d+)-', slot)
-                    if prefix_match:
-                        prefix = prefix_match.group(1)
-                        numbers = re.findall(r'(\d+)-', slot)
-                        slot_codes = [f"{prefix}{num}" for num in numbers]
-
-                # Add dash to each slot code to match official timetable format
-                slot_codes = [f"{code}-" for code in slot_codes]
-
-                # Register these slot codes with the course
-                for code in slot_codes:
-                    enhanced_mapping[code] = course_info
-
-                # Also register the full original slot for reference
-                enhanced_mapping[slot] = course_info
-
-                # Track this as a multi-slot lab for debugging
-                multi_slot_labs[slot] = slot_codes
-
-            # Regular single slot
-            else:
-                enhanced_mapping[slot] = course_info
+            keys, lab_codes = _expand_slot(slot)
+            update_mapping((key, course_info) for key in keys)
+
+            # Track multi-slot labs for debugging
+            if lab_codes is not None:
+                multi_slot_labs[slot] = lab_codes
 
         logger.info(f"Processed {len(course_data)} courses, found {len(multi_slot_labs)} multi-slot labs")
         for lab_slot, codes in multi_slot_labs.items():
             logger.info(f"Lab slot {lab_slot} mapped to individual codes: {', '.join(codes)}")
 
         # Define break codes: slots with no corresponding course info
-        break_codes = set()
-        for day, slots in official_tt.items():
-            for _, slot_code in slots.items():
-                if "/" in slot_code:
-                    for part in slot_code.split("/"):
-                        part = part.strip()
-                        if part and part not in enhanced_mapping:
-                            break_codes.add(part)
-                else:
-                    if slot_code and slot_code not in enhanced_mapping:
-                        break_codes.add(slot_code)
+        break_codes = _SLOT_CODES_BY_BATCH[batch_num] - enhanced_mapping.keys()
 
         # Merge official timetable with the mapping
         logger.info("Merging timetable with course information...")
         merged_tt = {}
-        for day, slots in official_tt.items():
+        for day, cells in official_cells:
             merged_day = {}
-            for time_slot, slot_code in slots.items():
+            for time_slot, slot_code, parts in cells:
                 merged_day[time_slot] = {
                     "time": time_slot,
                     "original_slot": slot_code,
@@ -1048,9 +1620,8 @@ class SRMScraper:
                 if self.is_empty_slot(slot_code):
                     continue
 
-                # Handle multiple parts if present (e.g., "A/X")
-                if "/" in slot_code:
-                    parts = [s.strip() for s in slot_code.split("/") if s.strip()]
+                # Handle multiple parts if present (e.g., "A/X"), split once at import
+                if parts is not None:
                     matched = []
                     for p in parts:
                         if p in enhanced_mapping:
@@ -1093,24 +1664,17 @@ class SRMScraper:
         }
 
     def store_timetable_in_supabase(self, merged_result):
-        """Store timetable data in Supabase with proper error handling and delays"""
+        """Store timetable data in Supabase with a single upsert keyed on user_id"""
         try:
             logger.info("Storing timetable data in Supabase...")
             
-            # Add delay before database operation
-            time.sleep(1)
-            
-            # Get user_id from email
-            user_query = supabase.table("users").select("id").eq("email", self.email).execute()
-            if not user_query.data:
-                raise Exception("User not found in database")
-            user_id = user_query.data[0]["id"]
-            
-            # Add delay between operations
-            time.sleep(1)
-            
-            # Check if timetable exists
-            existing = supabase.table("timetable").select("*").eq("user_id", user_id).execute()
+            # Get user_id from email (reuse the one resolved earlier in this run if any)
+            user_id = self._user_id
+            if not user_id:
+                user_query = supabase.table("users").select("id").eq("email", self.email).execute()
+                if not user_query.data:
+                    raise Exception("User not found in database")
+                user_id = user_query.data[0]["id"]
             
             # Prepare timetable data
             timetable_data = {
@@ -1120,19 +1684,9 @@ class SRMScraper:
                 "personal_details": merged_result.get("personal_details", {})
             }
             
-            # Add delay before final operation
-            time.sleep(1)
-            
-            if existing.data and len(existing.data) > 0:
-                # Update existing record
-                update_resp = supabase.table("timetable").update(timetable_data).eq("user_id", user_id).execute()
-                if not update_resp.data:
-                    raise Exception("Failed to update timetable data")
-            else:
-                # Insert new record
-                insert_resp = supabase.table("timetable").insert(timetable_data).execute()
-                if not insert_resp.data:
-                    raise Exception("Failed to insert timetable data")
+            upsert_resp = supabase.table("timetable").upsert(timetable_data, on_conflict="user_id").execute()
+            if not upsert_resp.data:
+                raise Exception("Failed to upsert timetable data")
                     
             logger.info("✅ Timetable data stored successfully")
             return True
@@ -1141,55 +1695,107 @@ class SRMScraper:
             logger.error(f"❌ Error storing timetable data: {e}")
             return False
 
+    def scrape_and_store_timetable(self):
+        """Scrape, merge and store the timetable using the already logged-in driver"""
+        # Step 1: Scrape timetable data
+        course_data = self.scrape_timetable()
+        if not course_data:
+            logger.error("Failed to scrape timetable data")
+            return {"status": "error", "message": "Failed to scrape timetable data"}
+        
+        # Step 2: Auto-detect the batch from the page
+        auto_batch = self.parse_batch_number_from_page(soup=self._timetable_soup)
+        logger.info(f"Scraped {len(course_data)} courses from timetable page; detected batch={auto_batch}")
+        
+        # Step 3: Merge timetable with course data
+        merged_result = self.merge_timetable_with_courses(course_data, auto_batch)
+        if merged_result["status"] != "success":
+            return merged_result
+        
+        # Step 4: Store timetable data in Supabase
+        store_success = self.store_timetable_in_supabase(merged_result)
+        if not store_success:
+            logger.error("Failed to store timetable in Supabase.")
+        else:
+            logger.info("Timetable stored in Supabase successfully.")
+        return merged_result
+
     def run_timetable_scraper(self):
         """Public interface to run the timetable scraper"""
         logger.info("Starting timetable scraper")
         try:
-            self.setup_driver()
+            if self.driver is None:
+                self.driver = self.setup_driver()
+            if self.driver is None:
+                logger.error("Failed to initialize Chrome driver")
+                return {"status": "error", "message": "Failed to initialize Chrome driver"}
             success = self.ensure_login()
             if not success:
                 logger.error("Failed to log in to Academia. Aborting timetable scraping.")
                 return {"status": "error", "message": "Login failed"}
             
-            # Step 1: Scrape timetable data
-            course_data = self.scrape_timetable()
-            if not course_data:
-                logger.error("Failed to scrape timetable data")
-                return {"status": "error", "message": "Failed to scrape timetable data"}
-            
-            # Step 2: Auto-detect the batch from the page
-            auto_batch = self.parse_batch_number_from_page()
-            logger.info(f"Scraped {len(course_data)} courses from timetable page; detected batch={auto_batch}")
-            
-            # Step 3: Merge timetable with course data
-            merged_result = self.merge_timetable_with_courses(course_data, auto_batch)
+            merged_result = self.scrape_and_store_timetable()
             if merged_result["status"] != "success":
-                self.driver.quit()
+                self.close_driver()
                 return merged_result
             
-            # Step 4: Store timetable data in Supabase
-            store_success = self.store_timetable_in_supabase(merged_result)
-            if not store_success:
-                logger.error("Failed to store timetable in Supabase.")
-            else:
-                logger.info("Timetable stored in Supabase successfully.")
-            
-            self.driver.quit()
+            self.close_driver()
             logger.info("Timetable scraper finished successfully")
             
             return merged_result
         
         except Exception as e:
             logger.error(f"Error in timetable scraper: {str(e)}")
-            if self.driver:
-                self.driver.quit()
+            self.close_driver()
             return {"status": "error", "message": str(e)}
 
+    def scrape_and_store_attendance(self):
+        """Scrape and store attendance and marks using the already logged-in driver"""
+        if HTTP_PAGE_FETCH:
+            # The browser is only needed for login; the page itself is a plain authenticated GET
+            try:
+                fetched = self.fetch_attendance_via_http(*self.browser_session())
+            except Exception as e:
+                logger.debug(f"Could not replay browser session over HTTP: {e}; using the browser")
+                fetched = None
+            if fetched:
+                return self.store_attendance_html(*fetched)
+        html_source = self.get_attendance_page()
+        if not html_source:
+            logger.error("Failed to load attendance page")
+            return {"status": "error", "message": "Failed to load attendance page"}
+        return self.store_attendance_html(html_source)
+
+    def store_attendance_html(self, html_source, soup=None):
+        """Parse an attendance page (or reuse its soup) and store its attendance and marks"""
+        # Parse once; registration, attendance and marks all read the same tree
+        if soup is None:
+            soup = BeautifulSoup(html_source, HTML_PARSER)
+        registration_number = self.extract_registration_number(soup)
+        if not registration_number:
+            logger.error("Failed to extract registration number")
+            return {"status": "error", "message": "Failed to extract registration number"}
+            
+        user_id = self.get_user_id(registration_number)
+        if not user_id:
+            logger.error("Failed to get or create user in database")
+            return {"status": "error", "message": "Failed to get or create user in database"}
+            
+        result = self.parse_and_save_attendance(html_source, self.driver, soup=soup)
+        marks_result = self.parse_and_save_marks(html_source, self.driver, soup=soup)
+        
+        return {
+            "status": "success",
+            "attendance": result,
+            "marks": marks_result
+        }
+
     def run_attendance_scraper(self):
         """Public interface to run the attendance scraper"""
         logger.info("Starting attendance scraper")
         try:
-            self.driver = self.setup_driver()
+            if self.driver is None:
+                self.driver = self.setup_driver()
             if self.driver is None:
                 logger.error("Failed to initialize Chrome driver")
                 return {"status": "error", "message": "Failed to initialize Chrome driver"}
@@ -1201,38 +1807,17 @@ class SRMScraper:
                 logger.error("Failed to log in to Academia. Aborting attendance scraping.")
                 return {"status": "error", "message": "Login failed"}
                 
-            html_source = self.get_attendance_page()
-            if not html_source:
-                logger.error("Failed to load attendance page")
-                return {"status": "error", "message": "Failed to load attendance page"}
-                
-            registration_number = self.extract_registration_number(BeautifulSoup(html_source, "html.parser"))
-            if not registration_number:
-                logger.error("Failed to extract registration number")
-                return {"status": "error", "message": "Failed to extract registration number"}
-                
-            user_id = self.get_user_id(registration_number)
-            if not user_id:
-                logger.error("Failed to get or create user in database")
-                return {"status": "error", "message": "Failed to get or create user in database"}
-                
-            result = self.parse_and_save_attendance(html_source, self.driver)
-            marks_result = self.parse_and_save_marks(html_source, self.driver)
+            combined_result = self.scrape_and_store_attendance()
+            if combined_result["status"] != "success":
+                return combined_result
             
-            self.driver.quit()
+            self.close_driver()
             logger.info("Attendance scraper finished successfully")
-            
-            combined_result = {
-                "status": "success",
-                "attendance": result,
-                "marks": marks_result
-            }
             return combined_result
             
         except Exception as e:
             logger.error(f"Error in attendance scraper: {str(e)}")
-            if self.driver:
-                self.driver.quit()
+            self.close_driver()
             return {"status": "error", "message": str(e)}
 
     def clear_browser_cache(self):
@@ -1248,12 +1833,11 @@ class SRMScraper:
 
     def log_memory_usage(self):
         """Log current memory usage to help with debugging"""
-        try:
-            import psutil
-            process = psutil.Process(os.getpid())
-            logger.info(f"Memory usage: {process.memory_info().rss / 1024 / 1024:.2f} MB")
-        except:
+        process = _current_process()
+        if process is None:
             logger.warning("Unable to log memory usage (psutil not available)")
+            return
+        logger.info(f"Memory usage: {process.memory_info().rss / _MB:.2f} MB")
 
     def apply_timeouts(self):
         """Apply various timeouts to improve reliability on Render"""
@@ -1272,11 +1856,12 @@ class SRMScraper:
             
             # Check file data
             file_data = {}
-            try:
-                with open('debug_cookies.json', 'r') as f:
-                    file_data = json.load(f)
-            except:
-                pass
+            if _DEBUG:
+                try:
+                    with open('debug_cookies.json', 'rb') as f:
+                        file_data = orjson.loads(f.read())
+                except:
+                    pass
             
             # Check database data
             db_data = {}
@@ -1304,7 +1889,11 @@ class SRMScraper:
             return None
 
     def run_unified_scraper(self):
-        """Run both scrapers in a single session"""
+        """
+        Log in once, then scrape and store attendance, marks and the timetable in the same browser.
+        The timetable preloads in a background tab while attendance is scraped. Returns per-part success
+        flags, timetable_data on success and a cookie-count summary; costs about as much as both single runs.
+        """
         logger.info("Starting unified scraper")
         
         result = {
@@ -1318,7 +1907,8 @@ class SRMScraper:
         
         try:
             # Setup driver
-            self.driver = self.setup_driver()
+            if self.driver is None:
+                self.driver = self.setup_driver()
             if self.driver is None:
                 logger.error("Failed to initialize Chrome driver")
                 result["message"] = "Failed to initialize Chrome driver"
@@ -1330,68 +1920,98 @@ class SRMScraper:
                 result["message"] = "Login failed"
                 return result
             
-            # Verify cookies after login
-            cookie_status = self.verify_cookies()
-            result["cookies"] = cookie_status
+            # Verify cookies after login; the result ends up in the job status, so only
+            # counts are reported, never cookie values or the stored token
+            cookie_status = self.verify_cookies() or {}
+            db_data = cookie_status.get("database") or {}
+            result["cookies"] = {
+                "browser": len(cookie_status.get("browser") or {}),
+                "database": len(db_data.get("cookies") or {}),
+                "token_stored": bool(db_data.get("token"))
+            }
+            
+            # The timetable loads in a background tab while attendance is scraped in this one
+            self.prefetch_timetable_tab()
             
-            # Continue with existing scraping logic...
+            attendance_result = self.scrape_and_store_attendance()
+            result["attendance_success"] = attendance_result["status"] == "success"
             
+            timetable_result = self.scrape_and_store_timetable()
+            result["timetable_success"] = timetable_result["status"] == "success"
+            if result["timetable_success"]:
+                result["timetable_data"] = timetable_result
+            self.close_timetable_tab()
+            
+            if result["attendance_success"] and result["timetable_success"]:
+                result["status"] = "success"
+                result["message"] = "Attendance and timetable scraped"
+            else:
+                failures = [r.get("message", "Unknown error") for r in (attendance_result, timetable_result)
+                            if r["status"] != "success"]
+                result["message"] = "; ".join(failures)
+            
+            logger.info("Unified scraper finished")
             return result
         except Exception as e:
-            logger.error(f"Error in unified scraper: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error in unified scraper")
             result["message"] = str(e)
             return result
+        finally:
+            self.close_driver()
 
     def verify_token(self, token):
         """Verify a JWT token"""
         try:
-            decoded = jwt.decode(
-                token,
-                os.getenv('JWT_SECRET_KEY', 'your-secret-key'),
-                algorithms=['HS256']
-            )
-            # Check if token has expired
-            exp = decoded.get('exp')
-            if exp and datetime.utcnow().timestamp() > exp:
-                logger.warning("Token has expired")
-                return None
-            return decoded['email']
+            email, _ = _decode_cached(token)
+            return email or None
+        except jwt.ExpiredSignatureError:
+            logger.warning("Token has expired")
+            return None
         except Exception as e:
-            logger.error(f"Token verification failed: {e}")
+            logger.error("Token verification failed: %s", e)
             return None
 
     def check_token_status(self):
         """Check token status in Supabase and local storage"""
         try:
-            # Check Supabase
-            result = supabase.table('user_cookies').select('token, updated_at').eq('email', self.email).execute()
-            if not result.data:
-                return {
-                    'status': 'error',
-                    'message': 'No token found in database'
-                }
+            # Check Supabase, unless this email's row was read moments ago
+            with _USER_COOKIE_CACHE_LOCK:
+                row = _USER_COOKIE_CACHE.get(self.email)
+            if row is None:
+                result = supabase.table('user_cookies').select('token, updated_at').eq('email', self.email).execute()
+                if not result.data:
+                    return {
+                        'status': 'error',
+                        'message': 'No token found in database'
+                    }
+                row = (result.data[0].get('token'), result.data[0].get('updated_at'))
+                with _USER_COOKIE_CACHE_LOCK:
+                    _USER_COOKIE_CACHE[self.email] = row
             
-            db_token = result.data[0].get('token')
-            updated_at = result.data[0].get('updated_at')
+            db_token, updated_at = row
             
-            # Verify the token
-            email = self.verify_token(db_token)
+            # Verify the token once; the same claims give both the email and the expiry
+            try:
+                email, exp = _decode_cached(db_token)
+            except jwt.InvalidTokenError as e:
+                logger.error("Token verification failed: %s", e)
+                email = None
             if not email:
                 return {
                     'status': 'error',
                     'message': 'Token is invalid or expired'
                 }
             
+            remaining = exp - time.time()
             return {
                 'status': 'success',
                 'email': email,
                 'updated_at': updated_at,
-                'days_remaining': self.get_token_days_remaining(db_token)
+                'days_remaining': max(0, int(remaining / _SECONDS_PER_DAY))
             }
         
         except Exception as e:
-            logger.error(f"Error checking token status: {e}")
+            logger.error("Error checking token status: %s", e)
             return {
                 'status': 'error',
                 'message': str(e)
@@ -1400,31 +2020,31 @@ class SRMScraper:
     def get_token_days_remaining(self, token):
         """Calculate days remaining before token expires"""
         try:
-            decoded = jwt.decode(
-                token,
-                os.getenv('JWT_SECRET_KEY', 'your-secret-key'),
-                algorithms=['HS256']
-            )
-            exp = decoded.get('exp')
-            if exp:
-                remaining = exp - datetime.utcnow().timestamp()
-                return max(0, int(remaining / (24 * 3600)))  # Convert to days
-            return 0
-        except:
+            _, exp = _decode_cached(token)
+        except Exception:
             return 0
+        # exp is a required claim, so a verified token always has it
+        return max(0, int((exp - time.time()) / _SECONDS_PER_DAY))
 
     def __del__(self):
-        """Destructor with forced resource cleanup"""
+        """Destructor fallback: hand a still-held driver back to the pool"""
         try:
-            if hasattr(self, 'driver') and self.driver:
-                self.driver.quit()
-                logger.info("Driver forcefully closed in destructor")
+            if getattr(self, '_owns_driver', False) and self.driver:
+                driver_pool.put(self.driver)
+                self.driver = None
+                logger.info("Driver returned to pool in destructor")
         except Exception as e:
-            logger.warning(f"Destructor error: {e}")
-        finally:
-            # Force garbage collection
-            import gc
-            gc.collect()
+            logger.warning("Destructor error: %s", e)
+        # Drop references to the big parsed pages so they don't wait on a later GC pass
+        self._timetable_soup = None
+        self._last_page_source = None
+
+# Scraper type -> SRMScraper method name for run_scraper
+_DISPATCH = {
+    "attendance": "run_attendance_scraper",
+    "timetable": "run_timetable_scraper",
+    "unified": "run_unified_scraper",
+}
 
 # Public interface to match the original script
 def run_scraper(email, password, scraper_type="attendance"):
@@ -1436,16 +2056,32 @@ def run_scraper(email, password, scraper_type="attendance"):
     - "timetable": Just run timetable scraper
     - "unified": Run both scrapers in a single browser session (recommended for Render)
     """
-    scraper = SRMScraper(email, password)
-    
-    if scraper_type.lower() == "attendance":
-        return scraper.run_attendance_scraper()
-    elif scraper_type.lower() == "timetable":
-        return scraper.run_timetable_scraper()
-    elif scraper_type.lower() == "unified":
-        return scraper.run_unified_scraper()
-    else:
+    method = _DISPATCH.get(scraper_type.lower())
+    if method is None:
         return {"status": "error", "message": f"Unknown scraper type: {scraper_type}"}
+    
+    with SRMScraper(email, password) as scraper:
+        return getattr(scraper, method)()
+
+async def scrape_user(email, password, scraper_type, executor):
+    """Run one blocking scrape on the executor so several users can overlap"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, run_scraper, email, password, scraper_type)
+
+async def _run_batch(credentials, scraper_type):
+    # One worker per pooled browser; extra users queue for a free driver
+    with ThreadPoolExecutor(max_workers=DRIVER_POOL_SIZE) as executor:
+        return await asyncio.gather(
+            *[scrape_user(email, password, scraper_type, executor) for email, password in credentials],
+            return_exceptions=True
+        )
+
+def run_scraper_batch(credentials, scraper_type="attendance"):
+    """
+    Scrape a batch of (email, password) pairs concurrently.
+    Returns results in input order; a failed user yields its exception instead of a result.
+    """
+    return asyncio.run(_run_batch(credentials, scraper_type))
 
 if __name__ == "__main__":
     import argparse